@@ -1,4 +1,5 @@
-from imdlib.core import IMD, open_data, get_data
+from imdlib.core import IMD, IMDDataset, open_data, open_dataset, get_data, extract_points, iter_data
 from imdlib.util import LeapYear, get_lat_lon, total_days, get_filename, get_filename_realtime
 from imdlib.real import open_real_data, get_real_data
+from imdlib.catalog import Catalog
 from .version import __version__
@@ -0,0 +1,166 @@
+"""
+Pre-converted cache of IMD binary (.grd) year files.
+
+Each year file is converted once into a ``.npy`` block that already has
+the (days, lon, lat) orientation used by the IMD class, next to a JSON
+sidecar describing the grid, sentinel, calendar and the source file it
+was made from::
+
+    <cache_dir>/<var_type>/<year>.npy
+    <cache_dir>/<var_type>/<year>.json
+
+Reading a cached year is a plain memory map of a contiguous block, with
+no decoding or transposing. A cached year is only used for the source
+path recorded in the sidecar, and while that file keeps the recorded
+size and modification time; otherwise it is rebuilt from the source.
+"""
+
+import json
+import os
+import numpy as np
+
+from imdlib.grd import GRD_DTYPE, read_grd
+from imdlib.util import atomic_write
+
+# Bump when the layout of cached blocks changes
+CACHE_VERSION = 2
+
+
+def _cache_paths(cache_dir, var_type, year):
+    base = os.path.join(cache_dir, var_type, str(year))
+    return base + '.npy', base + '.json'
+
+
+def _read_meta(meta_file):
+    """Sidecar of a cached block as a dict, or None if it is unusable."""
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+
+def cached_year(fname, var_type, year, cache_dir):
+    """
+    Path of a valid cached block for a year file, or None.
+
+    The block is valid if its sidecar matches the cache version, was made
+    from the same source path and, if the source file still exists, its
+    size and modification time. If the source file no longer exists the
+    cached block is used as is.
+    """
+    npy, meta_file = _cache_paths(cache_dir, var_type, year)
+    if not os.path.isfile(npy):
+        return None
+    meta = _read_meta(meta_file)
+    if meta is None:
+        return None
+    # a cache_dir shared by several archives holds one of them per year
+    if meta.get('source') != os.path.abspath(fname):
+        return None
+    if os.path.isfile(fname):
+        stat = os.stat(fname)
+        if (meta['source_size'] != stat.st_size or
+                meta['source_mtime_ns'] != stat.st_mtime_ns):
+            return None
+    return npy
+
+
+def cache_year(fname, var_type, year, days, lat, lon, cache_dir):
+    """
+    Convert one year file into a cached block and its JSON sidecar.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the source binary file.
+
+    var_type : str
+        'rain', 'tmin' or 'tmax'.
+
+    year : int
+        Year stored in the file.
+
+    days : int
+        Number of days in the year.
+
+    lat, lon : numpy 1D array
+        Grid coordinates of the file.
+
+    cache_dir : str
+        Root directory of the cache.
+
+    Returns
+    -------
+    str
+        Path of the cached ``.npy`` block.
+    """
+    npy, meta_file = _cache_paths(cache_dir, var_type, year)
+    os.makedirs(os.path.dirname(npy), exist_ok=True)
+    stat = os.stat(fname)
+
+    block = np.empty((days, len(lon), len(lat)), dtype=GRD_DTYPE)
+    read_grd(fname, days, len(lat), len(lon), block)
+
+    # Same sentinel conventions as open_data
+    if var_type == 'rain':
+        sentinel = -999.0
+    else:
+        sentinel = float(block[0, 0, 0])
+
+    meta = {
+        'version': CACHE_VERSION,
+        'var_type': var_type,
+        'source': os.path.abspath(fname),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'dtype': GRD_DTYPE.str,
+        'shape': list(block.shape),
+        'dims': ['time', 'lon', 'lat'],
+        'lat': {'start': float(lat[0]), 'stop': float(lat[-1]),
+                'size': len(lat)},
+        'lon': {'start': float(lon[0]), 'stop': float(lon[-1]),
+                'size': len(lon)},
+        'sentinel': sentinel,
+        'calendar': {'start_day': '{}-01-01'.format(year),
+                     'end_day': '{}-12-31'.format(year),
+                     'days': days},
+    }
+
+    # Write to unique temporary files first so a crash never leaves a
+    # half-written block that looks valid and concurrent writers of the
+    # same year do not share a temporary file
+    atomic_write(npy, lambda f: np.save(f, block))
+    atomic_write(meta_file, lambda f: f.write(json.dumps(meta).encode()))
+    return npy
+
+
+def cached_sentinel(npy):
+    """Sentinel recorded in the sidecar of a cached block."""
+    meta = _read_meta(os.path.splitext(npy)[0] + '.json')
+    if meta is None:
+        return load_cached(npy)[0, 0, 0]
+    return np.float32(meta['sentinel'])
+
+
+def load_cached(npy):
+    """Memory-map a cached block as a read-only (days, lon, lat) array."""
+    return np.load(npy, mmap_mode='r')
+
+
+def read_cached(npy, out, day_lo=0, day_hi=None, lat_slice=None,
+                lon_slice=None):
+    """
+    Copy a day range and grid window of a cached block into out.
+
+    Parameters are the same as for imdlib.grd.read_grd.
+    """
+    if lat_slice is None:
+        lat_slice = slice(None)
+    if lon_slice is None:
+        lon_slice = slice(None)
+    out[...] = load_cached(npy)[day_lo:day_hi, lon_slice, lat_slice]
+    return out
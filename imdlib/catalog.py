@@ -0,0 +1,246 @@
+"""
+Catalog of the IMD files stored in a local directory.
+
+A Catalog scans a file directory once and indexes the gridded archive
+files (per variable and year) and the real-time daily files (per
+variable and day) it holds, with their size and naming convention.
+open_data, iter_data, extract_points and open_real_data accept a
+catalog to resolve file names without probing the file system, and the
+catalog answers coverage and gap queries for planning jobs.
+
+Recognised layouts are the ones written by get_data and get_real_data::
+
+    <file_dir>/<var_type>/<year>.grd|.GRD           fn_format='yearwise'
+    <file_dir>/<var_type>/Rainfall_ind<year>_rfp25.grd     (IMD names)
+    <file_dir>/<year>.grd|.GRD, <file_dir>/Rainfall_ind...  (no sub_dir)
+    <file_dir>/rain_ind0.25_<yy_mm_dd>.grd, max<ddmmyyyy>.grd, ...
+
+A flat <file_dir>/<year>.GRD file carries no variable name, so, as in
+get_filename, it is listed for both 'tmin' and 'tmax'.
+"""
+
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from imdlib.core import _archive_grid
+from imdlib.grd import GRD_DTYPE
+from imdlib.real import _real_grid
+from imdlib.util import LeapYear
+
+# (file name pattern, fn_format) of the archive files of every variable
+ARCHIVE_PATTERNS = {
+    'rain': [(re.compile(r'^(\d{4})\.grd$'), 'yearwise'),
+             (re.compile(r'^Rainfall_ind(\d{4})_rfp25\.grd$'), None)],
+    'tmax': [(re.compile(r'^(\d{4})\.GRD$'), 'yearwise'),
+             (re.compile(r'^Maxtemp_MaxT_(\d{4})\.GRD$'), None)],
+    'tmin': [(re.compile(r'^(\d{4})\.GRD$'), 'yearwise'),
+             (re.compile(r'^Mintemp_MinT_(\d{4})\.GRD$'), None)],
+}
+
+# (file name pattern, date format) of the real-time files of every variable
+REALTIME_PATTERNS = {
+    'rain': (re.compile(r'^rain_ind0\.25_(\d{2}_\d{2}_\d{2})\.grd$'),
+             '%y_%m_%d'),
+    'rain_gpm': (re.compile(r'^(\d{8})\.grd$'), '%d%m%Y'),
+    'tmax': (re.compile(r'^max(\d{8})\.grd$'), '%d%m%Y'),
+    'tmin': (re.compile(r'^min(\d{8})\.grd$'), '%d%m%Y'),
+}
+
+
+def _list_files(directory):
+    """(name, size) of the regular files in a directory."""
+    try:
+        with os.scandir(directory) as entries:
+            return [(entry.name, entry.stat().st_size) for entry in entries
+                    if entry.is_file()]
+    except OSError:
+        return []
+
+
+class Catalog():
+    """
+    Index of the archive and real-time files in a directory.
+
+    Parameters
+    ----------
+    file_dir : str or None
+        Directory holding the files, as passed to get_data/open_data.
+        If None, the currently working directory is used.
+
+    Attributes
+    ----------
+    archive : dict
+        {var_type: {year: [entry, ...]}} of archive files.
+
+    realtime : dict
+        {var_type: {day: entry}} of real-time daily files.
+
+    Every entry is a dict with the 'path', 'size' and 'fn_format' of a
+    file, and 'complete' telling whether the size matches the grid and
+    number of days.
+
+    Examples
+    --------
+    >>> cat = imd.Catalog('data')
+    >>> cat.years('rain')
+    >>> cat.gaps('rain', 1901, 2020)
+    >>> data = imd.open_data('rain', 2000, 2010, catalog=cat)
+    """
+
+    def __init__(self, file_dir=None):
+        self.file_dir = file_dir
+        self.refresh()
+
+    def __repr__(self):
+        lines = ['Catalog of {}'.format(self.file_dir or os.getcwd())]
+        for var_type in sorted(self.archive):
+            years = self.years(var_type)
+            lines.append('  {:<8s} archive   {}-{} ({} years)'.format(
+                var_type, years[0], years[-1], len(years)))
+        for var_type in sorted(self.realtime):
+            days = self.days(var_type)
+            lines.append('  {:<8s} real-time {} to {} ({} days)'.format(
+                var_type, days[0].date(), days[-1].date(), len(days)))
+        return '\n'.join(lines)
+
+    def refresh(self):
+        """Scan the directory again."""
+        root = self.file_dir if self.file_dir is not None else '.'
+        self.archive = {}
+        self.realtime = {}
+
+        root_files = _list_files(root)
+        for var_type, patterns in ARCHIVE_PATTERNS.items():
+            n_cells = np.prod([len(axis) for axis in _archive_grid(var_type)])
+            # Files in the variable subdirectory come first
+            for directory, files in ((os.path.join(root, var_type),
+                                      _list_files(os.path.join(root, var_type))),
+                                     (root, root_files)):
+                for name, size in files:
+                    for pattern, fn_format in patterns:
+                        match = pattern.match(name)
+                        if match is None:
+                            continue
+                        year = int(match.group(1))
+                        days = 366 if LeapYear(year) else 365
+                        entry = {'path': self._join(directory, name),
+                                 'size': size,
+                                 'fn_format': fn_format,
+                                 'complete': size == days * n_cells *
+                                 GRD_DTYPE.itemsize}
+                        self.archive.setdefault(var_type, {}).setdefault(
+                            year, []).append(entry)
+
+        for var_type, (pattern, date_format) in REALTIME_PATTERNS.items():
+            n_cells = np.prod([len(axis) for axis in _real_grid(var_type)])
+            for name, size in root_files:
+                match = pattern.match(name)
+                if match is None:
+                    continue
+                try:
+                    day = pd.Timestamp(datetime.strptime(match.group(1),
+                                                         date_format))
+                except ValueError:
+                    continue
+                entry = {'path': self._join(root, name),
+                         'size': size,
+                         'fn_format': None,
+                         'complete': size == n_cells * GRD_DTYPE.itemsize}
+                self.realtime.setdefault(var_type, {})[day] = entry
+
+    def _join(self, directory, name):
+        # Same relative paths as get_filename when file_dir is None
+        if self.file_dir is None and directory == '.':
+            return name
+        if self.file_dir is None:
+            return os.path.relpath(os.path.join(directory, name))
+        return os.path.join(directory, name)
+
+    def years(self, var_type):
+        """Sorted list of the years with an archive file of var_type."""
+        return sorted(self.archive.get(var_type, {}))
+
+    def days(self, var_type):
+        """DatetimeIndex of the days with a real-time file of var_type."""
+        return pd.DatetimeIndex(sorted(self.realtime.get(var_type, {})))
+
+    def entry(self, var_type, year, fn_format=None):
+        """
+        Catalog entry of the archive file of var_type for a year, or None.
+
+        Complete files are preferred, then, among them, files named after
+        fn_format, then files in the variable subdirectory.
+        """
+        entries = self.archive.get(var_type, {}).get(int(year))
+        if not entries:
+            return None
+        return sorted(entries, key=lambda e: (not e['complete'],
+                                              e['fn_format'] != fn_format))[0]
+
+    def path(self, var_type, year, fn_format=None):
+        """Path of the archive file of var_type for a year."""
+        entry = self.entry(var_type, year, fn_format)
+        if entry is None:
+            raise Exception("Error in file reading, no {} file for year {} "
+                            "in the catalog".format(var_type, year))
+        return entry['path']
+
+    def realtime_path(self, var_type, day):
+        """Path of the real-time file of var_type for a day."""
+        entry = self.realtime.get(var_type, {}).get(pd.Timestamp(day))
+        if entry is None:
+            raise Exception("Error in file reading, no real-time {} file for "
+                            "{} in the catalog".format(
+                                var_type, pd.Timestamp(day).date()))
+        return entry['path']
+
+    def coverage(self, var_type, realtime=False):
+        """
+        First and last year (or day, if realtime) present for var_type,
+        or None if there is no file.
+        """
+        present = self.days(var_type) if realtime else self.years(var_type)
+        if len(present) == 0:
+            return None
+        return present[0], present[-1]
+
+    def gaps(self, var_type, start=None, end=None, realtime=False):
+        """
+        Years (or days, if realtime) between start and end that have no
+        file or only an incomplete one.
+
+        start and end default to the coverage of var_type.
+
+        Returns
+        -------
+        list of int, or pandas DatetimeIndex if realtime
+        """
+        coverage = self.coverage(var_type, realtime)
+        if coverage is None and (start is None or end is None):
+            return [] if not realtime else pd.DatetimeIndex([])
+        if start is None:
+            start = coverage[0]
+        if end is None:
+            end = coverage[1]
+        if realtime:
+            files = self.realtime.get(var_type, {})
+            wanted = pd.date_range(start, end, freq='D')
+            return pd.DatetimeIndex([day for day in wanted
+                                     if day not in files or
+                                     not files[day]['complete']])
+        return [year for year in range(int(start), int(end) + 1)
+                if not any(e['complete'] for e in
+                           self.archive.get(var_type, {}).get(year, []))]
+
+    def incomplete(self, var_type, realtime=False):
+        """Paths of files of var_type whose size does not match the grid."""
+        if realtime:
+            entries = self.realtime.get(var_type, {}).values()
+        else:
+            entries = [e for year in self.archive.get(var_type, {}).values()
+                       for e in year]
+        return sorted(e['path'] for e in entries if not e['complete'])
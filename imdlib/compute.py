@@ -4,6 +4,7 @@ from datetime import datetime
 from scipy.stats import norm, rankdata
 import imdlib
 from imdlib.drought import spi, spei
+from imdlib.util import float_dtype
 
 
 class Compute(object):
@@ -497,8 +498,8 @@ def anu_trend(imd_obj):
         data = imd_obj.data
         # nan_hint = data[0, 0, 0]
         bk_list = bk_point(imd_obj)
-        out_data = np.ones(
-            (1, data.shape[1], data.shape[2]), dtype=np.float64) * np.nan
+        out_data = np.full(
+            (1, data.shape[1], data.shape[2]), np.nan, dtype=float_dtype(data))
         if imd_obj.cat == 'rain':
             new_data = np.ones(
                 (bk_list.shape[0], data.shape[1], data.shape[2]),
@@ -510,7 +511,7 @@ def anu_trend(imd_obj):
                     tmp_data = data[bk_list[i - 1]:bk_list[i], :, :]
 
                 # tmp_data[tmp_data == nan_hint] = np.nan
-                new_data[i, :, :] = tmp_data[:, :, :].sum(0)
+                new_data[i, :, :] = tmp_data[:, :, :].sum(0, dtype=np.float64)
                 # new_data[new_data == np.nan] = nan_hint
         else:
             new_data = np.ones(
@@ -523,7 +524,7 @@ def anu_trend(imd_obj):
                     tmp_data = data[bk_list[i - 1]:bk_list[i], :, :]
 
                 # tmp_data[tmp_data == nan_hint] = np.nan
-                new_data[i, :, :] = tmp_data[:, :, :].mean(0)
+                new_data[i, :, :] = tmp_data[:, :, :].mean(0, dtype=np.float64)
 
         # new_data[np.where(np.isnan(new_data))] = nan_hint
         # idx = np.argwhere(new_data[0, :, :] != nan_hint)
@@ -588,16 +589,15 @@ def dtr_anu(tmx, **kwargs):
         raise Exception('tmin data not set/given')
     if tmx.cat == 'tmax' and tmn.cat == 'tmin':
         data1 = tmx.data
-        nan_hint = data1[0, 0, 0]
-        data1[data1 == nan_hint] = np.nan
+        data1[data1 == tmx._sentinel()] = np.nan
         data2 = tmn.data
-        data2[data2 == nan_hint] = np.nan
+        data2[data2 == tmn._sentinel()] = np.nan
         data = data1 - data2
         bk_list = bk_point(tmx)
         bk_list.shape[0]
-        new_data = np.ones(
+        new_data = np.full(
             (bk_list.shape[0], data.shape[1], data.shape[2]),
-            dtype=np.float64) * np.nan
+            np.nan, dtype=float_dtype(data))
         for i in range(bk_list.shape[0]):
             if i == 0:
                 tmp_data = data[0:bk_list[i], :, :]
@@ -605,7 +605,7 @@ def dtr_anu(tmx, **kwargs):
                 tmp_data = data[bk_list[i - 1]:bk_list[i], :, :]
 
             tmp_data[tmp_data == tmp_data[0, 0, 0]] = np.nan
-            new_data[i, :, :] = tmp_data[:, :, :].mean(0)
+            new_data[i, :, :] = tmp_data[:, :, :].mean(0, dtype=np.float64)
 
         # new_data[np.where(np.isnan(new_data))] = nan_hint
         if tmx.land_mask is not None:
@@ -646,10 +646,10 @@ def mxadt(imd_obj):
     else:
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
-        nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones(
+        nan_hint = imd_obj._sentinel()
+        new_data = np.full(
             (bk_list.shape[0], imd_obj.data.shape[1], imd_obj.data.shape[2]),
-            dtype=np.float64) * np.nan
+            np.nan, dtype=float_dtype(imd_obj.data))
         for i in range(bk_list.shape[0]):
             if i == 0:
                 tmp_data = imd_obj.data[0:bk_list[i], :, :].copy()
@@ -697,10 +697,10 @@ def mnadt_anu(imd_obj):
     else:
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
-        nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones(
+        nan_hint = imd_obj._sentinel()
+        new_data = np.full(
             (bk_list.shape[0], imd_obj.data.shape[1], imd_obj.data.shape[2]),
-            dtype=np.float64) * np.nan
+            np.nan, dtype=float_dtype(imd_obj.data))
         for i in range(bk_list.shape[0]):
             if i == 0:
                 tmp_data = imd_obj.data[0:bk_list[i], :, :].copy()
@@ -748,9 +748,10 @@ def rxa(imd_obj):
     else:
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
-        nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0], imd_obj.data.shape[1],
-                           imd_obj.data.shape[2]), dtype=np.float64) * np.nan
+        nan_hint = imd_obj._sentinel()
+        new_data = np.full((bk_list.shape[0], imd_obj.data.shape[1],
+                            imd_obj.data.shape[2]), np.nan,
+                           dtype=float_dtype(imd_obj.data))
         for i in range(bk_list.shape[0]):
             if i == 0:
                 tmp_data = imd_obj.data[0:bk_list[i], :, :].copy()
@@ -799,10 +800,10 @@ def rx5d(imd_obj):
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
         # nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -856,10 +857,10 @@ def dr(imd_obj, threshold=2.5):
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
         # nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -911,10 +912,10 @@ def cwd(imd_obj, threshold=2.5):
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
         # nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -971,10 +972,10 @@ def cdd(imd_obj, threshold=1.0):
         raise Exception('Input data is not rainfall type')
     else:
         bk_list = bk_point(imd_obj)
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -1033,10 +1034,10 @@ def d64(imd_obj, threshold=64.5):
         bk_list = bk_point(imd_obj)
         bk_list.shape[0]
         # nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -1087,10 +1088,10 @@ def rtwd(imd_obj, threshold=2.5):
     else:
         bk_list = bk_point(imd_obj)
         # nan_hint = imd_obj.data[0, 0, 0]
-        new_data = np.ones((bk_list.shape[0],
+        new_data = np.full((bk_list.shape[0],
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         if imd_obj.land_mask is not None:
             idx = np.argwhere(imd_obj.land_mask)
@@ -1105,9 +1106,9 @@ def rtwd(imd_obj, threshold=2.5):
                 idx = np.argwhere(~ np.isnan(tmp_data[0, :, :]))
             for i2 in range(len(idx)):
                 new_data[i, idx[i2, 0], idx[i2, 1]] = \
-                    sum(tmp_data[:, idx[i2, 0],
-                        idx[i2, 1]][tmp_data[:, idx[i2, 0], idx[i2, 1]]
-                        >= threshold])
+                    np.sum(tmp_data[:, idx[i2, 0],
+                           idx[i2, 1]][tmp_data[:, idx[i2, 0], idx[i2, 1]]
+                           >= threshold], dtype=np.float64)
 
         imd_obj.data = new_data
         imd_obj.time_step = new_data.shape[0]
@@ -1183,13 +1184,13 @@ def pci(imd_obj):
     if not imd_obj.cat == 'rain':
         raise Exception('Input data is not rainfall type')
     else:
-        nan_hint = imd_obj.data[0, 0, 0]
+        nan_hint = imd_obj._sentinel()
         bk_list_month = bk_point_month(imd_obj)
 
-        new_data = np.ones((int(bk_list_month.shape[0]/12),
+        new_data = np.full((int(bk_list_month.shape[0]/12),
                             imd_obj.data.shape[1],
                             imd_obj.data.shape[2]),
-                           dtype=np.float64) * np.nan
+                           np.nan, dtype=float_dtype(imd_obj.data))
 
         mon_data = np.ones((bk_list_month.shape[0],
                             imd_obj.data.shape[1],
@@ -1204,7 +1205,7 @@ def pci(imd_obj):
                     bk_list_month[i-1]:bk_list_month[i], :, :].copy()
 
             tmp_data[tmp_data == nan_hint] = np.nan
-            mon_data[i, :, :] = tmp_data[:, :, :].sum(0)
+            mon_data[i, :, :] = tmp_data[:, :, :].sum(0, dtype=np.float64)
 
             if ((i+1) % 12 == 0 and i > 1):
                 new_data[((i+1)//12)-1, :, :] = \
@@ -2,18 +2,28 @@
 Developed by Saswata Nandi, Pratiman Patel and Sabyasachi Swain 
 """
 
-import array
 import numpy as np
 import pandas as pd
 import os
 import requests
 import xarray as xr
-from imdlib.util import LeapYear, get_lat_lon, total_days, get_filename, parse_date_input
+from xarray.backends import BackendArray
+from xarray.core import indexing as xr_indexing
+from imdlib.util import LeapYear, get_lat_lon, total_days, get_filename, parse_date_input, float_dtype, \
+    get_bbox_slices, get_lat_lon_index, get_filename_realtime
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
 # Added 14-05-2023 #
 from scipy.interpolate import griddata 
 from imdlib.compute import Compute, bk_point_month
-from imdlib.naming import RAW_METADATA, VAR_METADATA
+from imdlib.naming import RAW_METADATA, VAR_METADATA, COORD_ATTRS, GLOBAL_ATTRS
+from imdlib.grd import GRD_DTYPE, GrdStack, grd_memmap, read_grd, write_grd
+from imdlib.cache import cache_year, cached_year, cached_sentinel, load_cached, read_cached
+from imdlib.download import download_files, pending_jobs
+from imdlib.export import write_netcdf, write_csv, write_parquet, write_geotiffs, year_blocks, \
+    land_cells, cell_block
+from imdlib.zonal import zonal_mean, zonal_weights
 try:
     import rioxarray as rio
     has_rioxarray = True
@@ -25,11 +35,15 @@ try:
 except ImportError:
     has_shapefile = False
 try:
-    from shapely.geometry import shape, Point
+    import shapely
+    from shapely.geometry import shape
     from shapely.ops import unary_union
     has_shapely = True
+    # vectorised predicates (contains_xy, prepare) need shapely >= 2
+    has_shapely2 = int(shapely.__version__.split('.')[0]) >= 2
 except ImportError:
     has_shapely = False
+    has_shapely2 = False
 
 import warnings
 warnings.filterwarnings("ignore", category=RuntimeWarning)
@@ -89,6 +103,11 @@ class IMD(Compute):
         self.no_days = no_days
         self.computed = False
         self.land_mask = land_mask
+        # Dataset returned by get_xarray and the state it was built from
+        self._xarray = None
+        # Sentinel of the source files, when it is not the corner value
+        # of data (e.g. temperature read with a bbox)
+        self.sentinel = None
         # Variable metadata — defaults from raw data type,
         # overridden by compute/heatwave/climatology/etc.
         meta = RAW_METADATA[cat]
@@ -100,8 +119,35 @@ class IMD(Compute):
     def shape(self):
         print(self.data.shape)
 
-    def to_csv(self, file_name=None, lat=None, lon=None, out_dir=None):
+    def to_csv(self, file_name=None, lat=None, lon=None, out_dir=None,
+               layout='long'):
+        """
+        Function to write an IMD object to a CSV file.
+
+        Parameters
+        ----------
+        file_name : str or None
+            Name of the file; '.csv' is added if there is no extension.
+
+        lat, lon : float or None
+            Coordinates of a grid point. If given, the time series of that
+            point is written to '<file_name>_<lat>_<lon>.csv'. If both are
+            None, every land_mask cell of the grid is written.
+
+        out_dir : str or None
+            Directory of the file.
+
+        layout : str
+            Layout of the full grid export. 'long' writes one
+            (time, lat, lon, value) row per time step and cell, 'wide' one
+            row per time step with a column per cell. The file is written
+            year by year and ocean cells are left out.
 
+        Examples
+        --------
+        >>> data.to_csv('rain')
+        >>> data.to_csv('rain', 20.03, 77.23, 'outputs')
+        """
         if file_name is None:
             file_name = 'test'
 
@@ -119,11 +165,11 @@ class IMD(Compute):
                                 "Given lon value is not in the IMD data range!! ")
 
         if lat is None and lon is None:
-            print("Latitude and Longitude are not given!!")
-            print("Converting 3D data to 2D data!!")
-            print("You should reconsider this operation!!")
-            outname = root + ext
-            self.get_xarray().to_dataframe().to_csv(outname)
+            if out_dir is not None:
+                outname = "{}{}{}{}".format(out_dir, '/', root, ext)
+            else:
+                outname = root + ext
+            write_csv(self, outname, layout)
 
         elif sum([bool(lat), bool(lon)]) == 1:
             raise Exception("Error in lat lon setting."
@@ -164,11 +210,279 @@ class IMD(Compute):
                        header=[str(lat) + ' ' + str(lon)],
                        float_format='%.4f')
 
+    def to_csv_points(self, points, file_name=None, out_dir=None,
+                      layout='wide'):
+        """
+        Function to write the time series of many grid points to CSV.
+
+        All points are mapped to their nearest grid cell at once and their
+        values gathered in one (time, n_points) array, so the cost per
+        point is only the writing of its column.
+
+        Parameters
+        ----------
+        points : array-like
+            Sequence of (lat, lon) pairs, shape (n_points, 2).
+
+        file_name : str or None
+            Name of the file; '.csv' is added if there is no extension.
+
+        out_dir : str or None
+            Directory of the file(s).
+
+        layout : str
+            'wide'     : one file '<file_name>.csv' with a 'DateTime'
+                         column and a column per point named '<lat> <lon>'.
+            'per_file' : one file per point, '<file_name>_<lat>_<lon>.csv',
+                         in the format of to_csv(file_name, lat, lon).
+
+        Examples
+        --------
+        >>> gauges = [(19.07, 72.88), (28.61, 77.21), (13.08, 80.27)]
+        >>> data.to_csv_points(gauges, 'gauges', layout='per_file')
+        """
+        if layout not in ('wide', 'per_file'):
+            raise Exception("Error in layout, it must be 'wide' or "
+                            "'per_file'")
+        if file_name is None:
+            file_name = 'test'
+
+        root, ext = os.path.splitext(file_name)
+        if not ext:
+            ext = '.csv'
+        if out_dir is not None:
+            root = "{}{}{}".format(out_dir, '/', root)
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        lat_index, lon_index = get_lat_lon_index(points[:, 0], points[:, 1],
+                                                 self.lat_array, self.lon_array)
+        series = self.data[:, lon_index, lat_index]
+        # formatted once and shared by every file
+        dates = pd.Index(self._time_index().strftime('%Y-%m-%d'),
+                         name='DateTime')
+        columns = [str(lat) + ' ' + str(lon) for lat, lon in points]
+
+        if layout == 'wide':
+            pd.DataFrame(series, index=dates, columns=columns).to_csv(
+                root + ext, float_format='%.4f')
+            return
+        for k, (lat, lon) in enumerate(points):
+            outname = "{}{}{:.2f}{}{:.2f}{}".format(root, '_', lat, '_', lon,
+                                                    ext)
+            pd.Series(series[:, k], index=dates, name=columns[k]).to_csv(
+                outname, header=True, float_format='%.4f')
+
+    def to_grd(self, file_name=None, out_dir=None, split=None,
+               fn_format='yearwise', sentinel=None, block_days=32):
+        """
+        Function to write an IMD object in the IMD binary (.grd) layout.
+
+        Every time step is written as a float32 (lat, lon) record, so the
+        files are read by the binary loaders like the IMD archive. Missing
+        cells (NaN, or the sentinel of raw data) are written as sentinel.
+        Raw data written this way is read back bit-identically.
+
+        Parameters
+        ----------
+        file_name : str or None
+            Name of the file when split is None; '.grd' is added if there
+            is no extension.
+
+        out_dir : str or None
+            Directory of the file(s).
+
+        split : str or None
+            None   : one file with every time step.
+            'year' : one file per year, named as the archive files of
+                     fn_format (see open_data). Partial years are padded
+                     with the sentinel, so
+                     open_data(var_type, start, end, fn_format, out_dir)
+                     reads them back.
+            'day'  : one file per day, named as the real-time files read
+                     by open_real_data(var_type, start, end, out_dir).
+
+        fn_format : str or None
+            Archive file naming used with split='year'.
+
+        sentinel : float or None
+            Value of missing cells. Defaults to -999 for rainfall and
+            99.9 for temperature, as in the IMD files.
+
+        block_days : int
+            Number of time steps converted and written at a time.
+
+        Returns
+        -------
+        list of str
+            Paths of the written files.
+
+        Examples
+        --------
+        >>> data = imd.open_data('rain', 2001, 2010, 'yearwise', 'data')
+        >>> data.data = corrected
+        >>> data.to_grd(out_dir='corrected', split='year')
+        >>> imd.open_data('rain', 2001, 2010, 'yearwise', 'corrected')
+        """
+        if split not in (None, 'year', 'day'):
+            raise Exception("Error in split, it must be None, 'year' or 'day'")
+        if split is not None and self.computed and self.scale != 'daily':
+            raise Exception("Only daily data can be split into IMD year or "
+                            "day files")
+        if sentinel is None:
+            sentinel = -999. if self.cat in ('rain', 'rain_gpm') else 99.9
+        if split is not None:
+            # the loaders only accept files of the full grid
+            if split == 'year':
+                lat_class, lon_class = _archive_grid(self.cat)
+                grid = 'archive'
+            else:
+                from imdlib.real import _real_grid
+                lat_class, lon_class = _real_grid(self.cat)
+                grid = 'real-time'
+            if (len(lat_class), len(lon_class)) != \
+                    (len(self.lat_array), len(self.lon_array)):
+                raise Exception("Error in grid, {} files need the full {} {} "
+                                "grid".format(split, self.cat, grid))
+
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+        time = self._time_index()
+        if split is None:
+            if file_name is None:
+                file_name = 'test'
+            root, ext = os.path.splitext(file_name)
+            if not ext:
+                ext = '.grd'
+            if out_dir is not None:
+                root = "{}{}{}".format(out_dir, '/', root)
+            jobs = [(root + ext, 0, len(time), 0, 0)]
+        elif split == 'year':
+            jobs = []
+            for t0, t1 in year_blocks(time):
+                year = time[t0].year
+                # padding of a partial year before and after the data
+                before = time[t0].dayofyear - 1
+                after = (366 if LeapYear(year) else 365) - before - (t1 - t0)
+                jobs.append((get_filename(year, self.cat, fn_format, out_dir),
+                             t0, t1, before, after))
+        else:
+            jobs = [(get_filename_realtime(day, self.cat, out_dir), t, t + 1,
+                     0, 0) for t, day in enumerate(time)]
+
+        _, n_lon, n_lat = self.data.shape
+        raw_sentinel = None if self.computed else self._sentinel()
+        pad = np.full((1, n_lon, n_lat), np.nan, dtype=GRD_DTYPE)
+        for fname, t0, t1, before, after in jobs:
+            # written next to the target and renamed once complete
+            with open(fname + '.part', 'wb') as f:
+                for _ in range(before):
+                    write_grd(f, pad, sentinel)
+                for b0 in range(t0, t1, block_days):
+                    block = np.asarray(self.data[b0:min(b0 + block_days, t1)])
+                    if raw_sentinel is not None and raw_sentinel != sentinel:
+                        block = np.where(block == raw_sentinel, np.nan, block)
+                    write_grd(f, block, sentinel)
+                for _ in range(after):
+                    write_grd(f, pad, sentinel)
+            os.replace(fname + '.part', fname)
+        return [job[0] for job in jobs]
+
+    def to_parquet(self, file_name=None, out_dir=None, layout='long',
+                   compression='snappy'):
+        """
+        Function to write the land_mask cells of an IMD object to a
+        Parquet file, with one row group per year.
+
+        Parameters
+        ----------
+        file_name : str or None
+            Name of the file; '.parquet' is added if there is no extension.
+
+        out_dir : str or None
+            Directory of the file.
+
+        layout : str
+            'long' for (time, lat, lon, value) rows, 'wide' for one row per
+            time step with a column per cell (see to_csv).
+
+        compression : str or None
+            Parquet compression codec, e.g. 'snappy', 'zstd' or None.
+
+        Requires pyarrow.
+
+        Examples
+        --------
+        >>> data.to_parquet('rain', layout='long', compression='zstd')
+        """
+        if file_name is None:
+            file_name = 'test'
+
+        root, ext = os.path.splitext(file_name)
+        if not ext:
+            ext = '.parquet'
+
+        if out_dir is not None:
+            outname = "{}{}{}{}".format(out_dir, '/', root, ext)
+        else:
+            outname = "{}{}".format(root, ext)
+        write_parquet(self, outname, layout, compression)
+
     def get_xarray(self):
+        """
+        Return the IMD object as an xarray Dataset with (time, lat, lon)
+        dimensions.
 
-        # swaping axes (time,lon,lat) > (time, lat,lon)
-        # to create xarray object
-        data_xr = np.swapaxes(self.data, 1, 2)
+        The variable is a lazy view of ``data``: nothing is copied when
+        the Dataset is built, and only the parts that are selected or
+        computed on are read, with the sentinels of raw data set to NaN
+        on access. Computed data is passed through without copying.
+
+        The Dataset is built once and cached. Later calls return a shallow
+        copy of it until ``data`` is assigned a new array or the time
+        axis, grid or variable metadata change. Since values are read on
+        access, in-place edits of ``data`` (e.g. fill_na) are always
+        visible, and loading one copy does not keep memory on the object.
+
+        Returns
+        -------
+        xarray.Dataset
+        """
+        key = self._xarray_key()
+        if self._xarray is not None and _same_key(self._xarray[0], key):
+            return self._xarray[1].copy(deep=False)
+
+        time = self._time_index()
+        time_units = 'days since {:%Y-%m-%d 00:00:00}'.format(time[0])
+
+        # swaping axes (time,lon,lat) > (time, lat,lon) on access
+        data_xr = xr.Variable(
+            ['time', 'lat', 'lon'],
+            xr_indexing.LazilyIndexedArray(_MaskedView(self)),
+            {'units': self.var_units, 'long_name': self.var_long_name})
+        xr_da = xr.Dataset(
+            {self.var_name: data_xr},
+            coords={'lat': self.lat_array,
+                    'lon': self.lon_array, 'time': time})
+
+        xr_da.time.encoding['units'] = time_units
+        for coord in ('time', 'lon', 'lat'):
+            xr_da[coord].attrs.update(COORD_ATTRS[coord])
+
+        xr_da.attrs.update(GLOBAL_ATTRS)
+        xr_da.attrs['history'] = str(datetime.utcnow()) + ' Python'
+
+        self._xarray = (key, xr_da)
+        return xr_da.copy(deep=False)
+
+    def _xarray_key(self):
+        """State the cached xarray Dataset was built from."""
+        return (self.data, self.lat_array, self.lon_array, self.data.shape,
+                self.computed, getattr(self, 'scale', None), self.start_day,
+                self.no_days, self.var_name, self.var_units,
+                self.var_long_name, self.sentinel)
+
+    def _time_index(self):
+        """Time coordinate of data (daily, or the scale of computed data)."""
         # To support computed data; Added on 23-07-2023
         if self.computed:
             if self.scale == 'A':
@@ -183,47 +497,44 @@ class IMD(Compute):
                 time = pd.date_range(self.start_day, periods=self.data.shape[0], freq='ME')
         else:
             time = pd.date_range(self.start_day, periods=self.no_days)
-        time_units = 'days since {:%Y-%m-%d 00:00:00}'.format(time[0])
-
-        xr_da = xr.Dataset(
-            {self.var_name: (['time', 'lat', 'lon'], data_xr,
-                             {'units': self.var_units,
-                              'long_name': self.var_long_name})},
-            coords={'lat': self.lat_array,
-                    'lon': self.lon_array, 'time': time})
+        return time
 
-        # Mask sentinel values only for raw (non-computed) data
-        if not self.computed:
-            if self.cat in ('rain', 'rain_gpm'):
-                xr_da = xr_da.where(xr_da[self.var_name] != -999.)
-            else:
-                xr_da = xr_da.where(xr_da[self.var_name] != data_xr[0, 0, 0])
+    def _sentinel(self):
+        """Value marking missing cells in raw data."""
+        if self.cat in ('rain', 'rain_gpm'):
+            return -999.
+        if self.sentinel is not None:
+            return self.sentinel
+        return self.data[0, 0, 0]
 
-        xr_da.time.encoding['units'] = time_units
-        xr_da.time.attrs['standard_name'] = 'time'
-        xr_da.time.attrs['long_name'] = 'time'
-
-        xr_da.lon.attrs['axis'] = 'X'  # Optional
-        xr_da.lon.attrs['standard_name'] = 'longitude'
-        xr_da.lon.attrs['long_name'] = 'longitude'
-        xr_da.lon.attrs['units'] = 'degrees_east'
-
-        xr_da.lat.attrs['axis'] = 'Y'  # Optional
-        xr_da.lat.attrs['standard_name'] = 'latitude'
-        xr_da.lat.attrs['long_name'] = 'latitude'
-        xr_da.lat.attrs['units'] = 'degrees_north'
-
-        xr_da.attrs['Conventions'] = 'CF-1.7'
-        xr_da.attrs['title'] = 'IMD gridded data'
-        xr_da.attrs['source'] = 'https://imdpune.gov.in/'
-        xr_da.attrs['history'] = str(datetime.utcnow()) + ' Python'
-        xr_da.attrs['references'] = ''
-        xr_da.attrs['comment'] = ''
-        xr_da.attrs['crs'] = 'epsg:4326'
+    def _masked_swapped(self, t0=0, t1=None, chunk_days=32):
+        """
+        Time steps t0..t1 of raw data as a (time, lat, lon) array with
+        sentinels set to NaN.
 
-        return xr_da
+        Filled chunk by chunk so the only temporaries are one chunk of
+        the boolean sentinel mask.
+        """
+        # Mask sentinel values only for raw (non-computed) data
+        sentinel = self._sentinel()
+        if t1 is None:
+            t1 = self.data.shape[0]
+        _, n_lon, n_lat = self.data.shape
+        out = np.empty((t1 - t0, n_lat, n_lon), dtype=float_dtype(self.data))
+        for c0 in range(0, t1 - t0, chunk_days):
+            block = out[c0:c0 + chunk_days]
+            block[...] = np.swapaxes(
+                self.data[t0 + c0:min(t0 + c0 + chunk_days, t1)], 1, 2)
+            block[block == sentinel] = np.nan
+        return out
+
+    def _swapped_block(self, t0, t1):
+        """Time steps t0..t1 as (time, lat, lon), masked if raw data."""
+        if self.computed:
+            return np.swapaxes(self.data[t0:t1], 1, 2)
+        return self._masked_swapped(t0, t1)
 
-    def spatial_mean(self, weighted=True):
+    def spatial_mean(self, weighted=True, chunk_days=366):
         """
         Compute area-weighted spatial mean, returning a time series.
 
@@ -239,6 +550,11 @@ class IMD(Compute):
             If True, weight each cell by cos(latitude) to correct for
             meridian convergence.  If False, use arithmetic mean.
 
+        chunk_days : int
+            Number of time steps reduced at a time. Only the land cells of
+            a chunk are gathered, and each chunk is reduced with one
+            matrix-vector product.
+
         Returns
         -------
         pandas.DataFrame
@@ -254,64 +570,212 @@ class IMD(Compute):
         >>> data = imd.open_data('rain', 1991, 2020, 'yearwise')
         >>> ts = data.compute('spi', 'M', timescale=3).spatial_mean()
         """
-        # --- Prepare data: replace sentinels with NaN ---
-        work_data = self.data.copy()
-        if not self.computed:
-            if self.cat in ('rain', 'rain_gpm'):
-                work_data[work_data == -999.0] = np.nan
-            else:
-                work_data[work_data == self.data[0, 0, 0]] = np.nan
+        lat_idx, lon_idx = land_cells(self)
+        weights = self._cell_weights(lat_idx, weighted)
+        time_index = self._time_index()
+        result = np.empty(len(time_index), dtype=np.float64)
+
+        # --- Weighted spatial mean, a block of time steps at a time ---
+        for t0 in range(0, len(time_index), chunk_days):
+            t1 = min(t0 + chunk_days, len(time_index))
+            values = cell_block(self, t0, t1, lat_idx, lon_idx)
+            valid = ~np.isnan(values)
+            total = np.where(valid, values, 0.0) @ weights
+            weight = valid @ weights
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[t0:t1] = np.where(weight > 0, total / weight, np.nan)
 
-        # Apply land_mask (excludes ocean + boundary artefacts)
-        if self.land_mask is not None:
-            work_data[:, ~self.land_mask] = np.nan
+        return pd.DataFrame(result, index=time_index,
+                            columns=[self.var_name])
 
-        # --- Build weight matrix: shape (lon_size, lat_size) ---
-        if weighted:
-            cos_lat = np.cos(np.deg2rad(self.lat_array))
-            weights = np.broadcast_to(
-                cos_lat, (len(self.lon_array), len(self.lat_array))).copy()
-        else:
-            weights = np.ones((len(self.lon_array), len(self.lat_array)))
+    def _cell_weights(self, lat_idx, weighted=True):
+        """cos(latitude) (or unit) weights of the given cells."""
+        if not weighted:
+            return np.ones(len(lat_idx))
+        return np.cos(np.deg2rad(np.asarray(self.lat_array, dtype=np.float64)
+                                 [lat_idx]))
 
-        # --- Weighted spatial mean per timestep ---
-        n_time = work_data.shape[0]
-        result = np.empty(n_time, dtype=np.float64)
+    def zonal_stats(self, zones, weighted=True, chunk_days=366):
+        """
+        Compute statistics of every zone of an integer zone raster.
 
-        for t in range(n_time):
-            slab = work_data[t, :, :]
-            valid = ~np.isnan(slab)
-            if not valid.any():
-                result[t] = np.nan
-            else:
-                w = weights[valid]
-                result[t] = np.sum(slab[valid] * w) / np.sum(w)
+        Cells of every zone are reduced per time step to the (area
+        weighted) mean, the sum, the minimum, the maximum and the number
+        of valid cells, in one pass over the data. Sentinels, NaN and
+        cells outside land_mask are excluded.
 
-        # --- Build DatetimeIndex (same logic as get_xarray) ---
-        if self.computed:
-            if self.scale == 'A':
-                time_index = pd.date_range(
-                    self.start_day, periods=n_time, freq='YE')
-            elif self.scale == 'climatology':
-                time_index = pd.date_range(
-                    '2000-01-01', periods=12, freq='ME')
-            elif self.scale == 'anomaly':
-                time_index = pd.date_range(
-                    self.start_day, periods=n_time, freq='ME')
-            elif self.scale == 'daily':
-                time_index = pd.date_range(
-                    self.start_day, periods=n_time)
-            elif self.scale == 'M':
-                time_index = pd.date_range(
-                    self.start_day, periods=n_time, freq='ME')
-        else:
-            time_index = pd.date_range(self.start_day, periods=self.no_days)
+        Parameters
+        ----------
+        zones : numpy 2D array of int or str
+            Zone id of every cell, shape (lon_size, lat_size) as
+            land_mask (e.g. imdlib/data/region_mask_025.npy), or the path
+            of such an array saved as .npy. Cells with a negative id are
+            left out.
 
-        return pd.DataFrame(result, index=time_index,
-                            columns=[self.var_name])
+        weighted : bool, default True
+            If True, the mean weights each cell by cos(latitude).
+
+        chunk_days : int
+            Number of time steps reduced at a time.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by time, with (statistic, zone) columns where the
+            statistic is 'mean', 'sum', 'min', 'max' or 'count'.
+
+        Examples
+        --------
+        >>> zones = np.load('district_raster_025.npy')
+        >>> stats = data.zonal_stats(zones)
+        >>> stats['mean']
+        """
+        if isinstance(zones, str):
+            zones = np.load(zones)
+        zones = np.asarray(zones)
+        if zones.shape != self.data.shape[1:]:
+            raise Exception("Error in zones, shape {} does not match the "
+                            "grid {}".format(zones.shape,
+                                             self.data.shape[1:]))
+        lat_idx, lon_idx = land_cells(self)
+        zone_of_cell = zones[lon_idx, lat_idx]
+        keep = zone_of_cell >= 0
+        # cells ordered by zone, so min/max reduce over contiguous runs
+        order = np.argsort(zone_of_cell[keep], kind='stable')
+        lat_idx, lon_idx = lat_idx[keep][order], lon_idx[keep][order]
+        zone_ids, starts, zone_pos = np.unique(zone_of_cell[keep][order],
+                                               return_index=True,
+                                               return_inverse=True)
+        if len(zone_ids) == 0:
+            raise Exception("Error in zones, no land cell has a zone id")
+
+        # (cell, zone) membership and weight matrices
+        n_cells = len(lat_idx)
+        shape = (n_cells, len(zone_ids))
+        rows = np.arange(n_cells)
+        member = sparse.csr_matrix((np.ones(n_cells), (rows, zone_pos)),
+                                   shape=shape)
+        weight = sparse.csr_matrix((self._cell_weights(lat_idx, weighted),
+                                    (rows, zone_pos)), shape=shape)
+
+        time_index = self._time_index()
+        n_time = len(time_index)
+        stats = {name: np.empty((n_time, len(zone_ids)))
+                 for name in ('mean', 'sum', 'min', 'max', 'count')}
+        for t0 in range(0, n_time, chunk_days):
+            t1 = min(t0 + chunk_days, n_time)
+            values = cell_block(self, t0, t1, lat_idx, lon_idx)
+            valid = ~np.isnan(values)
+            filled = np.where(valid, values, 0.0).astype(np.float64)
+            valid = valid.astype(np.float64)
+            total = (weight.T @ filled.T).T
+            weight_sum = (weight.T @ valid.T).T
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stats['mean'][t0:t1] = np.where(weight_sum > 0,
+                                                total / weight_sum, np.nan)
+            stats['sum'][t0:t1] = (member.T @ filled.T).T
+            stats['count'][t0:t1] = (member.T @ valid.T).T
+            # fmin/fmax skip NaN; zones without valid cells stay NaN
+            stats['min'][t0:t1] = np.fmin.reduceat(values, starts, axis=1)
+            stats['max'][t0:t1] = np.fmax.reduceat(values, starts, axis=1)
+
+        stats['count'] = stats['count'].round().astype(np.int64)
+        frame = pd.concat({name: pd.DataFrame(values, index=time_index,
+                                              columns=zone_ids)
+                           for name, values in stats.items()}, axis=1)
+        frame.columns.names = ['stat', 'zone']
+        return frame
+
+    def zonal_mean(self, shpfile, id_field=None, weighted=True,
+                   cache_dir=None, chunk_days=366):
+        """
+        Compute the area-weighted mean of every feature of a shapefile.
+
+        Every cell counts for a feature with the fraction of its area
+        covered by the feature (times cos(latitude) if weighted), so small
+        features and features along the coast get exact averages. The
+        sparse (feature, cell) weight matrix is built once per shapefile
+        and grid, and can be kept in cache_dir for later calls; every
+        block of time steps is then averaged with one sparse product.
 
-    def to_netcdf(self, file_name=None, out_dir=None):
+        Parameters
+        ----------
+        shpfile : str
+            The name of shapefile with full path. Geometries must be in
+            lon/lat degrees.
+
+        id_field : str or None
+            Attribute used to label the features. If None, features are
+            numbered from 0 in file order.
+
+        weighted : bool, default True
+            If True, weights include cos(latitude).
 
+        cache_dir : str or None
+            Directory to keep the weight matrices in, keyed by a hash of
+            the shapefile geometry and the grid.
+
+        chunk_days : int
+            Number of time steps averaged at a time.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by time, one column per feature.
+
+        Examples
+        --------
+        >>> data = imd.open_data('rain', 1991, 2020, 'yearwise')
+        >>> districts = data.zonal_mean('districts.shp', 'DIST_CODE',
+        ...                             cache_dir='weights')
+        """
+        ids, weights = zonal_weights(shpfile, self.lat_array, self.lon_array,
+                                     id_field, weighted, cache_dir)
+        return zonal_mean(self, weights, ids, chunk_days)
+
+    def to_netcdf(self, file_name=None, out_dir=None, chunks=None,
+                  compression=None, complevel=4, stream=False, append=False):
+        """
+        Function to write an IMD object to a NetCDF file.
+
+        Parameters
+        ----------
+        file_name : str or None
+            Name of the file; '.nc' is added if there is no extension.
+
+        out_dir : str or None
+            Directory of the file.
+
+        chunks : tuple of 3 int or None
+            (time, lat, lon) chunk shape. Defaults to a year of time steps
+            on a 16 x 16 cell tile, which keeps point time series reads
+            cheap.
+
+        compression : str or None
+            Compression of the variable, e.g. 'zlib' (or any other value
+            accepted by netCDF4, such as 'zstd').
+
+        complevel : int
+            Compression level, default 4.
+
+        stream : bool
+            If True, data is written one year at a time along an unlimited
+            time dimension, so the masked cube is never held in memory.
+
+        append : bool
+            If True, the data is appended in time to an existing file
+            holding the same variable and grid.
+
+        Without any of chunks, compression, stream and append the file is
+        written from get_xarray() in one go, in the same layout as before
+        (fixed time dimension, contiguous storage). The other options
+        need the netCDF4 library.
+
+        Examples
+        --------
+        >>> data = imd.open_data('rain', 1981, 2020, 'yearwise')
+        >>> data.to_netcdf('rain', compression='zlib', stream=True)
+        """
         if file_name is None:
             file_name = 'test'
 
@@ -319,35 +783,71 @@ class IMD(Compute):
         if not ext:
             ext = '.nc'
 
-        xr_da_masked = self.get_xarray()
         if out_dir is not None:
             outname = "{}{}{}{}".format(out_dir, '/', root, ext)
         else:
             outname = "{}{}".format(root, ext)
-        xr_da_masked.to_netcdf(outname)
 
-    def to_geotiff(self, file_name=None, out_dir=None):
-        try:
-            import rioxarray as rio
-            if file_name is None:
-                file_name = 'test'
-            root, ext = os.path.splitext(file_name)
-            if not ext:
-                ext = '.tif'
-            xr_da_masked = self.get_xarray()
-            xr_da_masked.rio.write_crs(xr_da_masked.crs, inplace=True)
-            if out_dir is not None:
-                outname = "{}{}{}{}".format(out_dir, '/', root, ext)
-            else:
-                outname = "{}{}".format(root, ext)
-            if self.computed:
-                nodata = np.nan
-            else:
-                nodata = xr_da_masked[self.var_name].data[0, -1, -1]
-            xr_da_masked[self.var_name].rio.write_nodata(nodata, inplace=True).rio.to_raster(outname)
-        except:
-            raise Exception("rioxarray is not installed")
-            
+        if chunks is None and compression is None and not stream \
+                and not append:
+            self.get_xarray().to_netcdf(outname)
+            return
+        write_netcdf(self, outname, chunks, compression, complevel, stream,
+                     append)
+
+    def to_geotiff(self, file_name=None, out_dir=None, split=None,
+                   compression='deflate', overviews=True, workers=1):
+        """
+        Function to write an IMD object to Cloud-Optimized GeoTIFF(s).
+
+        Bands are streamed to disk in blocks of days, so memory use does
+        not grow with the length of the data. Files are tiled, compressed,
+        north up, carry internal overviews, use NaN as nodata and have one
+        band per time step, described by its date.
+
+        Parameters
+        ----------
+        file_name : str or None
+            Name of the file; '.tif' is added if there is no extension.
+
+        out_dir : str or None
+            Directory of the file(s).
+
+        split : str or None
+            None writes a single file, 'year' one file per year
+            ('<file_name>_<YYYY>.tif') and 'day' one file per time step
+            ('<file_name>_<YYYY-MM-DD>.tif').
+
+        compression : str or None
+            GDAL compression, e.g. 'deflate', 'lzw' or 'zstd'.
+
+        overviews : bool
+            Whether to add internal overviews.
+
+        workers : int
+            Number of files written in parallel when split is set.
+
+        Requires rasterio.
+
+        Returns
+        -------
+        list of str
+            Paths of the written files.
+
+        Examples
+        --------
+        >>> data.to_geotiff('rain', 'maps', split='day', workers=4)
+        """
+        if file_name is None:
+            file_name = 'test'
+        root, ext = os.path.splitext(file_name)
+        if not ext:
+            ext = '.tif'
+        if out_dir is not None:
+            root = "{}{}{}".format(out_dir, '/', root)
+        return write_geotiffs(self, root, ext, split, workers,
+                              compression=compression, overviews=overviews)
+
     def compute(self, method=None, scale=None, **kwargs) -> Compute:
         """
         Function for computing climat indices.
@@ -406,14 +906,11 @@ class IMD(Compute):
         n_months = bk_list.shape[0]
 
         # Determine sentinel value
-        if self.cat in ('rain', 'rain_gpm'):
-            nan_hint = -999.0
-        else:
-            nan_hint = self.data[0, 0, 0]
+        nan_hint = self._sentinel()
 
-        mon_data = np.ones((n_months, self.data.shape[1],
-                            self.data.shape[2]),
-                           dtype=np.float64) * np.nan
+        mon_data = np.full((n_months, self.data.shape[1],
+                            self.data.shape[2]), np.nan,
+                           dtype=float_dtype(self.data))
 
         for i in range(n_months):
             if i == 0:
@@ -424,12 +921,14 @@ class IMD(Compute):
             tmp_data[tmp_data == nan_hint] = np.nan
 
             if self.cat in ('rain', 'rain_gpm'):
-                mon_data[i, :, :] = np.nansum(tmp_data, axis=0)
+                mon_data[i, :, :] = np.nansum(tmp_data, axis=0,
+                                              dtype=np.float64)
                 # np.nansum returns 0 for all-NaN slices; restore NaN
                 all_nan = np.all(np.isnan(tmp_data), axis=0)
                 mon_data[i, all_nan] = np.nan
             else:
-                mon_data[i, :, :] = np.nanmean(tmp_data, axis=0)
+                mon_data[i, :, :] = np.nanmean(tmp_data, axis=0,
+                                               dtype=np.float64)
 
         # Apply land_mask
         if self.land_mask is not None:
@@ -468,15 +967,15 @@ class IMD(Compute):
         n_months = mon_data.shape[0]
 
         # Group by calendar month and compute mean across years
-        clim_data = np.ones((12, self.data.shape[1],
-                             self.data.shape[2]),
-                            dtype=np.float64) * np.nan
+        clim_data = np.full((12, self.data.shape[1],
+                             self.data.shape[2]), np.nan,
+                            dtype=mon_data.dtype)
 
         for m in range(12):
             # Collect same calendar month across all years
             month_indices = np.arange(m, n_months, 12)
             clim_data[m, :, :] = np.nanmean(
-                mon_data[month_indices, :, :], axis=0)
+                mon_data[month_indices, :, :], axis=0, dtype=np.float64)
 
         # Apply land_mask
         if self.land_mask is not None:
@@ -683,7 +1182,7 @@ class IMD(Compute):
         >>> data = imd.open_data(variable, start_yr, end_yr, 'yearwise')
         >>> data.fill_na()
         """
-        nan_hint = self.data[0, 0, 0]
+        nan_hint = self._sentinel()
         self.data[self.data == nan_hint] = np.nan
         # Find grid index where few nan present but not all times they are nan
         id_x, id_y = np.where(np.isnan(self.data).any(axis=0)
@@ -750,33 +1249,50 @@ class IMD(Compute):
                          dnew)
         Ynew, Xnew = np.meshgrid(ynew, xnew)
 
-        tmp = self.data.copy()
-        tmp[tmp == tmp[0, 0, 0]] = np.nan
+        tmp = np.array(self.data, dtype=float_dtype(self.data))
+        if not self.computed:
+            # computed data only holds NaN for missing cells
+            tmp[tmp == self._sentinel()] = np.nan
         self.data = np.zeros((tmp.shape[0], len(xnew), len(ynew)),
-                             dtype=np.float64)
+                             dtype=float_dtype(tmp))
         for i in range(tmp.shape[0]):
             self.data[i, :, :] = griddata((xf, yf), tmp[i, :, :].flatten(),
                                           (Xnew, Ynew), method='nearest')
 
         self.lat_array = ynew
         self.lon_array = xnew
+        if not self.computed:
+            # missing cells are NaN now, not the sentinel of the files
+            self.sentinel = np.nan
 
         if self.land_mask is not None:
             self.land_mask = ~np.isnan(self.data[0, :, :])
 
-    def clip(self, shpfile):
+    def clip(self, shpfile, inplace=True):
         """
         Function to clip a IMD object for a roi using shapefile.
 
+        Cells whose centre lies inside the union of the shapes are kept;
+        the grid is cut to the bounding box of the shapes and the other
+        cells are set to NaN and removed from land_mask. The inside mask
+        is computed with one vectorised containment test and cached by
+        shapefile path, modification time and grid, so clipping many
+        objects with the same shapefile computes it once.
+
         Parameters
         ----------
         shpfile : str
             The name of shapefile with full path.
 
+        inplace : bool, default True
+            If True, the object itself is clipped. If False, it is left
+            unchanged and a clipped object holding a copy of the bounding
+            box window only is returned.
+
         Returns
         -------
         IMD object
-            Modified IMD object clipped using the shapefile
+            Clipped IMD object (self if inplace)
 
         Examples
         --------
@@ -785,47 +1301,59 @@ class IMD(Compute):
         >>> variable = 'tmax'
         >>> data = imd.open_data(variable, start_yr, end_yr, 'yearwise')
         >>> data.clip('shapefile_folder_path/shapefile_name.shp')
+        >>> basin = data.clip('basin.shp', inplace=False)
         """
-        if has_shapefile and has_shapely:
-            sf = Reader(shpfile)
-
-            shapes = sf.shapes()
-            polygons = [shape(shape_obj.__geo_interface__) for shape_obj in shapes]
-            combined_polygon = unary_union(polygons)
-            
-            lon_min, lat_min, lon_max, lat_max = combined_polygon.bounds
-
-            lon_min_indx = np.abs(self.lon_array - lon_min).argmin()
-            lon_max_indx = np.abs(self.lon_array - lon_max).argmin()
-            lat_min_indx = np.abs(self.lat_array - lat_min).argmin()
-            lat_max_indx = np.abs(self.lat_array - lat_max).argmin()
-
-            lon_min = self.lon_array[lon_min_indx]
-            lon_max = self.lon_array[lon_max_indx]
-            lat_min = self.lat_array[lat_min_indx]
-            lat_max = self.lat_array[lat_max_indx]
-
-            self.lon_array = self.lon_array[(self.lon_array >= lon_min) *
-                                            (self.lon_array <= lon_max)]
-            self.lat_array = self.lat_array[(self.lat_array >= lat_min) *
-                                            (self.lat_array <= lat_max)]
-
-            self.data = self.data[:, lon_min_indx:lon_max_indx + 1,
-                                  lat_min_indx:lat_max_indx + 1]
-
-            if self.land_mask is not None:
-                self.land_mask = self.land_mask[lon_min_indx:lon_max_indx + 1,
-                                                lat_min_indx:lat_max_indx + 1]
-
-            for i in range(self.data.shape[1]):      # lon loop
-                for j in range(self.data.shape[2]):  # lat loop
-                    pt = Point(self.lon_array[i], self.lat_array[j])
-                    if not pt.within(combined_polygon):
-                        self.data[:, i, j] = np.nan
-                        if self.land_mask is not None:
-                            self.land_mask[i, j] = False
-        else:
+        if not (has_shapefile and has_shapely):
             raise Exception("shapefile or shapely library is missing")
+        lon_window, lat_window, inside = _clip_mask(shpfile, self.lat_array,
+                                                    self.lon_array)
+        data = self.data[:, lon_window, lat_window]
+        land_mask = None
+        if self.land_mask is not None:
+            land_mask = self.land_mask[lon_window, lat_window] & inside
+
+        if inplace:
+            target = self
+        else:
+            data = np.array(data)
+            target = IMD(data, self.cat, self.start_day, self.end_day,
+                         self.no_days, self.lat_array, self.lon_array)
+            target.computed = self.computed
+            target.sentinel = self.sentinel
+            target.method = getattr(self, 'method', None)
+            target.scale = getattr(self, 'scale', None)
+            target.var_name = self.var_name
+            target.var_units = self.var_units
+            target.var_long_name = self.var_long_name
+        data[:, ~inside] = np.nan
+        target.data = data
+        target.lon_array = self.lon_array[lon_window]
+        target.lat_array = self.lat_array[lat_window]
+        target.land_mask = land_mask
+        return target
+
+    def load(self):
+        """
+        Function to bring lazily opened data into memory.
+
+        Data opened with ``open_data(..., lazy=True)`` is a read-only view
+        of the files on disk. This replaces it with an in-memory numpy
+        array so in-place operations (fill_na, remap, ...) can be used.
+        It does nothing if the data is already in memory.
+
+        Returns
+        -------
+        IMD object
+
+        Examples
+        --------
+        >>> data = imd.open_data('rain', 1901, 2020, 'yearwise', lazy=True)
+        >>> data.data = data.data[-365:]  # only the last year is read
+        >>> data.load()
+        """
+        if isinstance(self.data, (GrdStack, np.memmap)):
+            self.data = np.array(self.data)
+        return self
 
     def copy(self):
         """
@@ -844,6 +1372,7 @@ class IMD(Compute):
                   self.land_mask.copy() if self.land_mask is not None else None)
         # Preserve computed state and variable metadata
         new.computed = self.computed
+        new.sentinel = self.sentinel
         new.method = getattr(self, 'method', None)
         new.scale = getattr(self, 'scale', None)
         new.var_name = self.var_name
@@ -853,7 +1382,46 @@ class IMD(Compute):
 
 
 
-def open_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None):
+def _same_key(old, new):
+    """Whether two _xarray_key states match (arrays by identity)."""
+    return all(a is b for a, b in zip(old[:3], new[:3])) and \
+        old[3:] == new[3:]
+
+
+class _MaskedView(BackendArray):
+    """
+    Read-only (time, lat, lon) view of IMD.data for xarray.
+
+    Every access swaps the requested block of (time, lon, lat) data and,
+    for raw data, sets its sentinels to NaN in a copy of the block only.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        n_time, n_lon, n_lat = obj.data.shape
+        self.shape = (n_time, n_lat, n_lon)
+        self.dtype = float_dtype(obj.data)
+
+    def __getitem__(self, key):
+        return xr_indexing.explicit_indexing_adapter(
+            key, self.shape, xr_indexing.IndexingSupport.BASIC,
+            self._getitem)
+
+    def _getitem(self, key):
+        # integer keys become length one slices so the axes stay in place
+        t, la, lo = (slice(k, k + 1) if isinstance(k, (int, np.integer))
+                     else k for k in key)
+        block = np.swapaxes(np.asarray(self.obj.data[t, lo, la]), 1, 2)
+        if not self.obj.computed:
+            block = block.astype(self.dtype)
+            block[block == self.obj._sentinel()] = np.nan
+        return block[tuple(0 if isinstance(k, (int, np.integer))
+                           else slice(None) for k in key)]
+
+
+def open_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None,
+              lazy=False, dtype=np.float64, workers=None, bbox=None,
+              cache_dir=None, catalog=None):
     """   
     Function to read binary data and return an IMD class object
     time range is tuple or list or numpy array of 2 int number
@@ -885,61 +1453,198 @@ def open_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None):
         If specify the directory address,
         Main directory should contain 3 subdirectory. <rain>, <tmin>, <tmax>
 
+    lazy : bool
+        If True, year files are memory-mapped instead of read into memory.
+        IMD.data then becomes a read-only virtual (time, lon, lat) stack
+        and only the parts that are sliced are read from disk.
+        The land mask is the same as for eager reads; for rainfall over a
+        full year the files are scanned once, chunk by chunk, for cells
+        that are zero on every day.
+        Use IMD.load() to bring the data into memory when in-place
+        operations (e.g. fill_na) are needed.
+
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of IMD.data. The files store float32 values,
+        so numpy.float32 keeps them exactly while halving the memory.
+        Computations on float32 objects return float32 results.
+
+    workers : int or None
+        Number of threads used to decode year files concurrently.
+        None or 1 reads the years one after the other.
+
+    bbox : tuple or None
+        (lon_min, lat_min, lon_max, lat_max) in degrees. If given, only
+        the grid cells inside the box are read from the files and the
+        returned object covers just that window (lat_array, lon_array
+        and land_mask included). The full grid is never allocated.
+
+    cache_dir : str or None
+        Directory of a pre-converted cache (see imdlib.cache). If given,
+        year files are read from their cached (days, lon, lat) blocks.
+        Years that are not cached yet, or whose source file changed size
+        or modification time, are converted first.
+
+    catalog : imdlib.Catalog or None
+        Catalog of file_dir. If given, file names are looked up in it
+        instead of being probed on disk, and all missing or incomplete
+        years are reported before anything is read.
+
     Returns
     -------
     IMD object
 
     """
 
-    # Parameters about IMD grid from:
-    # http://www.imdpune.gov.in/Clim_Pred_LRF_New/Grided_Data_Download.html
-    #######################################
-    lat_size_rain = 129
-    lon_size_rain = 135
-    lat_rain = np.linspace(6.5, 38.5, lat_size_rain)
-    lon_rain = np.linspace(66.5, 100.0, lon_size_rain)
-
-    lat_size_temp = 31
-    lon_size_temp = 31
-    lat_temp = np.linspace(7.5, 37.5, lat_size_temp)
-    lon_temp = np.linspace(67.5, 97.5, lon_size_temp)
-    #######################################
-    # Format Date into <yyyy-mm-dd>
-
     # Parse start/end inputs (supports both int years and 'YYYY-MM-DD' strings)
-    start_day, end_day, start_yr_int, end_yr_int = parse_date_input(start_yr, end_yr)
+    start_day, end_day, _, _ = parse_date_input(start_yr, end_yr)
 
-    # Full-year boundaries for loading complete year files
-    full_start_day = f"{start_yr_int}-01-01"
-    full_end_day = f"{end_yr_int}-12-31"
+    # Decide which variable we are looking into
+    lat_class, lon_class, lat_slice, lon_slice = _grid_window(var_type, bbox)
+    dtype = _check_dtype(dtype)
+
+    return _load_range(var_type, start_day, end_day, fn_format, file_dir,
+                       lat_class, lon_class, lat_slice, lon_slice, dtype,
+                       lazy, workers, cache_dir, catalog=catalog)
 
-    # Get total no of days for full year range (considering leap years)
-    no_days_full = total_days(full_start_day, full_end_day)
 
-    # Get total no of days for requested range
+def _load_range(var_type, start_day, end_day, fn_format, file_dir,
+                lat_class, lon_class, lat_slice, lon_slice, dtype,
+                lazy=False, workers=None, cache_dir=None, out=None,
+                catalog=None):
+    """
+    Read the days start_day..end_day of a grid window into an IMD object.
+
+    If out is given the data is decoded into it (it must have the shape
+    of the result) instead of a newly allocated array.
+    """
+    start_yr_int = int(start_day[0:4])
+    end_yr_int = int(end_day[0:4])
     no_days = total_days(start_day, end_day)
+    lat_size_class = len(lat_class)
+    lon_size_class = len(lon_class)
+
+    # Files and day ranges to read for every year
+    jobs = _year_jobs(var_type, start_day, end_day, start_yr_int, end_yr_int,
+                      fn_format, file_dir, catalog)
+
+    if cache_dir is not None:
+        jobs = _use_cache(jobs, var_type, start_yr_int, lat_class, lon_class,
+                          cache_dir)
+
+    # Sentinel of temperature files is the corner value of the full grid,
+    # which may lie outside the grid window
+    sentinel = None
+    if var_type != 'rain' and (lat_slice.start != 0 or lon_slice.start != 0):
+        sentinel = _corner_value(jobs[0][0])
+
+    if lazy:
+        all_data = _open_lazy(jobs, lat_size_class, lon_size_class, dtype,
+                              lat_slice, lon_slice)
+    else:
+        # all_data -> container for the requested days and grid window only
+        # all_data.shape = (no_days, len(lon), len(lat))
+        if out is None:
+            all_data = np.empty((no_days, lon_slice.stop - lon_slice.start,
+                                 lat_slice.stop - lat_slice.start),
+                                dtype=dtype)
+        else:
+            all_data = out
+        _read_years(jobs, lat_size_class, lon_size_class, all_data, workers,
+                    lat_slice, lon_slice)
 
-    # Decide which variable we are looking into
+    # Build land mask to identify valid grid cells
+    land_mask = _sentinel_mask(var_type, all_data[0, :, :], sentinel)
     if var_type == 'rain':
-        lat_size_class = lat_size_rain
-        lon_size_class = lon_size_rain
+        # Part 1 (above): mask -999 sentinel (ocean/outside India)
+        # Part 2: mask cells with zero rainfall across all loaded days
+        # (boundary cells with no real observations, reported as 0.0)
+        # Only apply when data spans at least a full year to avoid
+        # false positives for short dry-season ranges
+        # (chunk by chunk, so lazy data is scanned without loading it)
+        if no_days >= 365:
+            land_mask = land_mask & _any_nonzero(all_data)
+
+    return _new_imd(var_type, all_data, start_day, end_day, no_days,
+                    land_mask, lat_class[lat_slice], lon_class[lon_slice],
+                    sentinel)
+
+
+def _grid_window(var_type, bbox=None):
+    """
+    Archive grid of var_type and the index slices to read from it
+    (the whole grid unless a bbox is given).
+    """
+    lat_class, lon_class = _archive_grid(var_type)
+    lat_slice = slice(0, len(lat_class))
+    lon_slice = slice(0, len(lon_class))
+    if bbox is not None:
+        lat_slice, lon_slice = get_bbox_slices(bbox, lat_class, lon_class)
+    return lat_class, lon_class, lat_slice, lon_slice
+
+
+def _check_dtype(dtype):
+    """Validate that dtype is a floating point type and return it."""
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise Exception("dtype must be a floating point type, "
+                        "got {}".format(dtype))
+    return dtype
+
+
+def _archive_grid(var_type):
+    """
+    Latitude and longitude arrays of the gridded archive for var_type.
+    """
+    # Parameters about IMD grid from:
+    # http://www.imdpune.gov.in/Clim_Pred_LRF_New/Grided_Data_Download.html
+    #######################################
+    if var_type == 'rain':
+        lat_size_rain = 129
+        lon_size_rain = 135
+        lat_rain = np.linspace(6.5, 38.5, lat_size_rain)
+        lon_rain = np.linspace(66.5, 100.0, lon_size_rain)
+        return lat_rain, lon_rain
     elif var_type == 'tmin' or var_type == 'tmax':
-        lat_size_class = lat_size_temp
-        lon_size_class = lon_size_temp
+        lat_size_temp = 31
+        lon_size_temp = 31
+        lat_temp = np.linspace(7.5, 37.5, lat_size_temp)
+        lon_temp = np.linspace(67.5, 97.5, lon_size_temp)
+        return lat_temp, lon_temp
     else:
         raise Exception("Error in variable type declaration."
                         "It must be 'rain'/'tmin'/'tmax'. Note: 'rain_gpm' is only available for real-time data.")
 
-    # Loop through all the years
-    # all_data -> container to store data for all the year
-    # all_data.shape = (no_days_full, len(lon), len(lat))
-    all_data = np.empty((no_days_full, lon_size_class, lat_size_class))
+
+def _year_jobs(var_type, start_day, end_day, start_yr, end_yr, fn_format,
+               file_dir, catalog=None):
+    """
+    Plan which part of every year file is needed for a date range.
+
+    Returns a list of (file name, days in file, first day, end day,
+    position in output) tuples. Only the first and last year are
+    trimmed; days are 0-based and the end day is exclusive.
+
+    With a catalog, file names are looked up in it and all missing or
+    incomplete years are reported at once.
+    """
+    if catalog is not None:
+        gaps = catalog.gaps(var_type, start_yr, end_yr)
+        if gaps:
+            raise Exception("Error in file reading, no complete {} file in "
+                            "the catalog for {} year(s): {}".format(
+                                var_type, len(gaps),
+                                ', '.join(str(year) for year in gaps)))
+
+    jobs = []
     # Counter for total days. It helps filling 'all_data' array.
     count_day = 0
-    for i in range(start_yr_int, end_yr_int + 1):
+    for i in range(start_yr, end_yr + 1):
 
         # Decide resolution of input file name
-        fname = get_filename(i, var_type, fn_format, file_dir)
+        if catalog is not None:
+            fname = catalog.path(var_type, i, fn_format)
+        else:
+            fname = get_filename(i, var_type, fn_format, file_dir)
 
         # Check if current year is leap year or not
         if LeapYear(i):
@@ -947,69 +1652,66 @@ def open_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None):
         else:
             days_in_year = 365
 
-        # length of total data point for current year
-        nlen = days_in_year * lat_size_class * lon_size_class
-
-        # temporary variable to read binary data
-        temp = array.array("f")
-        with open(fname, 'rb') as f:
-            temp.fromfile(f, os.stat(fname).st_size // temp.itemsize)
-
-        data = np.array(list(map(lambda x: x, temp)))
-        
-        # Added for new url (dated:Oct 10, 2022)
-        # Removing first element for rain for new url: https://imdpune.gov.in/lrfindex.php 
-        # Removing (commented out) as it was no longer needed to remove the first element anymore. (dated: March 31, 2023)
-        # if var_type == 'rain':
-        #    data = data[1:]
-            
-        # Check consistency of data points
-        if len(data) != nlen:
-            raise Exception("Error in file reading,"
-                            "mismatch in size of data-length")
-
-        # Reshape data into a shape of
-        # (days_in_year, lon_size_class, lat_size_class)
-        data = np.transpose(np.reshape(data, (days_in_year, lat_size_class,
-                                              lon_size_class), order='C'), (0, 2, 1))
-        all_data[count_day:count_day + len(data), :, :] = data
-        count_day += len(data)
-        # Stack data vertically to get multi-year data
-        # if i != time_range[0]:
-        #     all_data = np.vstack((all_data, data))
-        # else:
-        #     all_data = data
-
-    # Slice data to requested date range (handles sub-year ranges)
-    if start_day != full_start_day or end_day != full_end_day:
-        start_offset = total_days(full_start_day, start_day) - 1
-        all_data = all_data[start_offset:start_offset + no_days, :, :]
+        # Trim first and last year to the requested days
+        day_lo = 0
+        day_hi = days_in_year
+        if i == start_yr:
+            day_lo = total_days(f"{i}-01-01", start_day) - 1
+        if i == end_yr:
+            day_hi = total_days(f"{i}-01-01", end_day)
 
-    # Build land mask to identify valid grid cells
-    if var_type == 'rain':
-        # Part 1: mask -999 sentinel (ocean/outside India)
-        land_mask = (all_data[0, :, :] != -999.0)
-        # Part 2: mask cells with zero rainfall across all loaded days
-        # (boundary cells with no real observations, reported as 0.0)
-        # Only apply when data spans at least a full year to avoid
-        # false positives for short dry-season ranges
-        if no_days >= 365:
-            all_zero = (all_data == 0.0).all(axis=0)
-            land_mask = land_mask & ~all_zero
-    else:
-        # tmin/tmax: sentinel is the corner value (data[0, 0, 0])
-        land_mask = (all_data[0, :, :] != all_data[0, 0, 0])
+        jobs.append((fname, days_in_year, day_lo, day_hi, count_day))
+        count_day += day_hi - day_lo
+    return jobs
 
-    # Create a IMD object
-    if var_type == 'rain':
-        data = IMD(all_data, 'rain', start_day, end_day, no_days,
-                   lat_rain, lon_rain, land_mask)
-    elif var_type == 'tmin':
-        data = IMD(all_data, 'tmin', start_day, end_day, no_days,
-                   lat_temp, lon_temp, land_mask)
-    elif var_type == 'tmax':
-        data = IMD(all_data, 'tmax', start_day, end_day, no_days,
-                   lat_temp, lon_temp, land_mask)
+
+def _read_years(jobs, lat_size, lon_size, all_data, workers=None,
+                lat_slice=None, lon_slice=None):
+    """
+    Decode the planned days of every year file into all_data.
+
+    Also used for real-time data, with one single-day job per daily file.
+    Each year seeks to its first needed day and reads only the requested
+    records. With workers > 1 the files are decoded concurrently by a
+    thread pool (file reads and numpy copies release the GIL). Every
+    year writes to a disjoint slice, and errors are raised in year order
+    so the outcome is the same as for a serial read.
+    """
+    def read_one(job, buf=None):
+        fname, days, day_lo, day_hi, offset = job
+        if fname.endswith('.npy'):
+            read_cached(fname, all_data[offset:offset + day_hi - day_lo, :, :],
+                        day_lo, day_hi, lat_slice, lon_slice)
+            return
+        read_grd(fname, days, lat_size, lon_size,
+                 all_data[offset:offset + day_hi - day_lo, :, :], buf,
+                 day_lo, day_hi, lat_slice, lon_slice)
+
+    if workers is None or workers <= 1 or len(jobs) <= 1:
+        # Raw float32 buffer reused for every year (sized for a leap year)
+        buf = np.empty(366 * lat_size * lon_size, dtype=GRD_DTYPE)
+        for job in jobs:
+            read_one(job, buf)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(read_one, job) for job in jobs]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _new_imd(var_type, all_data, start_day, end_day, no_days, land_mask,
+             lat, lon, sentinel=None):
+    """Create an IMD object for var_type on the given grid."""
+    if var_type in ('rain', 'tmin', 'tmax'):
+        data = IMD(all_data, var_type, start_day, end_day, no_days,
+                   lat, lon, land_mask)
+        data.sentinel = sentinel
     else:
         raise Exception("Error in variable type declaration."
                         "It must be 'rain'/'tmin'/'tmax'. Note: 'rain_gpm' is only available for real-time data.")
@@ -1017,7 +1719,414 @@ def open_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None):
     return data
 
 
-def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub_dir=False, proxies=None):
+def _sentinel_mask(var_type, first_day, sentinel=None):
+    """Land mask from the sentinel value of a single (lon, lat) day."""
+    if var_type == 'rain':
+        return first_day != -999.0
+    # tmin/tmax: sentinel is the corner value (data[0, 0, 0])
+    if sentinel is None:
+        sentinel = first_day[0, 0]
+    return first_day != sentinel
+
+
+def _any_nonzero(all_data, chunk_days=32):
+    """
+    (lon, lat) cells that are not zero on some day, checked chunk by
+    chunk so no boolean temporary as large as the cube is made.
+    """
+    found = np.zeros(all_data.shape[1:], dtype=bool)
+    for t0 in range(0, all_data.shape[0], chunk_days):
+        found |= (all_data[t0:t0 + chunk_days] != 0.0).any(axis=0)
+    return found
+
+
+_CLIP_MASKS = {}
+
+
+def _clip_mask(shpfile, lat, lon):
+    """
+    Bounding box window and inside mask of a shapefile on a grid.
+
+    Returns the lon and lat slices of the grid cells in the bounding box
+    of the shapes and a read-only (lon, lat) boolean array of the window
+    telling whether each cell centre lies inside the union of the shapes.
+    Results are cached by shapefile path, modification time and grid.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    key = (os.path.abspath(shpfile), os.stat(shpfile).st_mtime_ns,
+           lat.tobytes(), lon.tobytes())
+    if key in _CLIP_MASKS:
+        return _CLIP_MASKS[key]
+
+    with Reader(shpfile) as sf:
+        polygons = [shape(shape_obj.__geo_interface__)
+                    for shape_obj in sf.shapes()]
+    combined_polygon = unary_union(polygons)
+
+    lon_min, lat_min, lon_max, lat_max = combined_polygon.bounds
+    lon_window = slice(np.abs(lon - lon_min).argmin(),
+                       np.abs(lon - lon_max).argmin() + 1)
+    lat_window = slice(np.abs(lat - lat_min).argmin(),
+                       np.abs(lat - lat_max).argmin() + 1)
+    lon_grid, lat_grid = np.meshgrid(lon[lon_window], lat[lat_window],
+                                     indexing='ij')
+    if has_shapely2:
+        shapely.prepare(combined_polygon)
+        inside = shapely.contains_xy(combined_polygon, lon_grid, lat_grid)
+    else:
+        from shapely import vectorized
+        inside = vectorized.contains(combined_polygon, lon_grid, lat_grid)
+    inside.flags.writeable = False
+    _CLIP_MASKS[key] = (lon_window, lat_window, inside)
+    return _CLIP_MASKS[key]
+
+
+def _corner_value(fname):
+    """First value of a binary file, i.e. the corner of the first day."""
+    if fname.endswith('.npy'):
+        return cached_sentinel(fname)
+    return np.fromfile(fname, dtype=GRD_DTYPE, count=1)[0]
+
+
+def _use_cache(jobs, var_type, start_yr, lat, lon, cache_dir):
+    """
+    Point year jobs at their cached blocks, converting years that are not
+    cached yet (or whose source file changed since).
+    """
+    cached_jobs = []
+    for k, (fname, days, day_lo, day_hi, offset) in enumerate(jobs):
+        year = start_yr + k
+        npy = cached_year(fname, var_type, year, cache_dir)
+        if npy is None:
+            npy = cache_year(fname, var_type, year, days, lat, lon, cache_dir)
+        cached_jobs.append((npy, days, day_lo, day_hi, offset))
+    return cached_jobs
+
+
+def _open_lazy(jobs, lat_size, lon_size, dtype, lat_slice=None,
+               lon_slice=None):
+    """
+    Memory-map all year files and stack them as a (time, lon, lat) view
+    trimmed to the requested date range and grid window.
+    """
+    if lat_slice is None:
+        lat_slice = slice(None)
+    if lon_slice is None:
+        lon_slice = slice(None)
+    blocks = []
+    for fname, days, day_lo, day_hi, _ in jobs:
+        if fname.endswith('.npy'):
+            # cached blocks are already (days, lon, lat)
+            blocks.append(load_cached(fname)[day_lo:day_hi, lon_slice,
+                                             lat_slice])
+            continue
+        year_map = grd_memmap(fname, days, lat_size, lon_size)
+        # (days, lat, lon) -> (days, lon, lat) without copying
+        blocks.append(np.transpose(
+            year_map[day_lo:day_hi, lat_slice, lon_slice], (0, 2, 1)))
+
+    return GrdStack(blocks, dtype)
+
+
+def iter_data(var_type, start_yr, end_yr=None, block='year', fn_format=None,
+              file_dir=None, dtype=np.float64, bbox=None, cache_dir=None,
+              catalog=None):
+    """
+    Generator reading binary data block by block as IMD class objects
+
+    Streams through long periods with constant memory: a single buffer,
+    sized for the largest block, is reused for every block.
+
+    Parameters
+    ----------
+    var_type : str
+        Three possible values.
+        1. "rain" -> input files are for daily rainfall values
+        2. "tmin" -> input files are for daily minimum temperature values
+        3. "tmax" -> input files are for daily maximum tempereature values
+
+    start_yr : int or str
+        Starting year or day ('YYYY-MM-DD') for opening data
+
+    end_yr : int or str
+        Ending year or day ('YYYY-MM-DD') for opening data
+
+    block : str or int
+        'year'  -> one block per calendar year
+        'month' -> one block per calendar month
+        int     -> blocks of that many days
+        Blocks are trimmed to the requested period.
+
+    fn_format, file_dir, dtype, bbox, cache_dir, catalog :
+        Same as for open_data.
+
+    Yields
+    ------
+    IMD object
+        One object per block with its own start_day, end_day, no_days and
+        land_mask. The data array is a view of the shared buffer and is
+        overwritten by the next block: use IMD.copy() to keep a block.
+
+    Examples
+    --------
+    >>> for year in imd.iter_data('rain', 1901, 2020, block='year',
+    ...                           fn_format='yearwise'):
+    ...     print(year.start_day, year.spatial_mean().mean())
+    """
+    start_day, end_day, _, _ = parse_date_input(start_yr, end_yr)
+    lat_class, lon_class, lat_slice, lon_slice = _grid_window(var_type, bbox)
+    dtype = _check_dtype(dtype)
+
+    days = pd.date_range(start_day, end_day, freq='D')
+    if block == 'year':
+        keys = days.year.values
+    elif block == 'month':
+        keys = days.year.values * 12 + days.month.values
+    elif isinstance(block, (int, np.integer)) and block > 0:
+        keys = np.arange(len(days)) // block
+    else:
+        raise Exception("block must be 'year', 'month' or a positive "
+                        "number of days")
+    # First day of every block, plus the end of the period
+    bounds = np.concatenate(([0], np.nonzero(np.diff(keys))[0] + 1,
+                             [len(days)]))
+
+    buf = np.empty((np.diff(bounds).max(), lon_slice.stop - lon_slice.start,
+                    lat_slice.stop - lat_slice.start), dtype=dtype)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        yield _load_range(var_type, days[lo].strftime('%Y-%m-%d'),
+                          days[hi - 1].strftime('%Y-%m-%d'), fn_format,
+                          file_dir, lat_class, lon_class, lat_slice,
+                          lon_slice, dtype, cache_dir=cache_dir,
+                          out=buf[:hi - lo], catalog=catalog)
+
+
+class IMDDataset():
+    """
+    Several IMD variables loaded for the same period.
+
+    Returned by open_dataset. Every variable is an IMD object sharing
+    start_day, end_day and no_days; variables on the same grid share
+    their lat_array and lon_array.
+
+    Attributes
+    ----------
+    variables : dict
+        {var_type: IMD object}, in the order they were requested.
+
+    start_day, end_day : str
+        First and last day in format YYYY-MM-DD.
+
+    no_days : int
+        Number of days.
+
+    Methods
+    ----------
+    get_xarray : return one xarray Dataset holding all variables
+    """
+
+    def __init__(self, variables, start_day, end_day, no_days):
+        self.variables = variables
+        self.start_day = start_day
+        self.end_day = end_day
+        self.no_days = no_days
+
+    def __getitem__(self, var_type):
+        return self.variables[var_type]
+
+    def __iter__(self):
+        return iter(self.variables)
+
+    def __len__(self):
+        return len(self.variables)
+
+    def __repr__(self):
+        return 'IMDDataset({}, {} to {})'.format(
+            ', '.join(self.variables), self.start_day, self.end_day)
+
+    def get_xarray(self):
+        """
+        Return all variables as one xarray Dataset.
+
+        Variables share the time coordinate. If all variables are on one
+        grid they share the lat/lon dimensions; otherwise every grid gets
+        its own dimensions named after its resolution, e.g. lat_025 and
+        lon_025 for rain and lat_100 and lon_100 for temperature.
+        """
+        grids = {}
+        for data in self.variables.values():
+            grids.setdefault(_grid_suffix(data.lat_array, data.lon_array),
+                             []).append(data)
+        parts = []
+        for suffix, members in grids.items():
+            for data in members:
+                ds = data.get_xarray()
+                if len(grids) > 1:
+                    ds = ds.rename({'lat': 'lat' + suffix,
+                                    'lon': 'lon' + suffix})
+                parts.append(ds)
+        return xr.merge(parts, combine_attrs='override')
+
+
+def _grid_suffix(lat, lon):
+    """Dimension suffix of a grid from its resolution (0.25 -> '_025')."""
+    res = lat[1] - lat[0] if len(lat) > 1 else lon[1] - lon[0]
+    return '_{:03d}'.format(int(round(res * 100)))
+
+
+def open_dataset(var_types, start_yr, end_yr=None, fn_format=None,
+                 file_dir=None, dtype=np.float64, workers=None, bbox=None,
+                 cache_dir=None, catalog=None):
+    """
+    Function to read several variables at once and return an IMDDataset
+
+    The period is parsed once, the grid of every distinct grid is set up
+    once and shared by its variables, and the variables are decoded in
+    parallel (one thread per variable).
+
+    Parameters
+    ----------
+    var_types : list of str
+        Variables to read, any of 'rain', 'tmin' and 'tmax'.
+
+    start_yr : int or str
+        Starting year or day ('YYYY-MM-DD') for opening data
+
+    end_yr : int or str
+        Ending year or day ('YYYY-MM-DD') for opening data
+
+    fn_format, file_dir, dtype, workers, bbox, cache_dir, catalog :
+        Same as for open_data. workers applies to the year files of every
+        variable.
+
+    Returns
+    -------
+    IMDDataset object
+
+    Examples
+    --------
+    >>> ds = imd.open_dataset(['rain', 'tmin', 'tmax'], 1991, 2020,
+    ...                       'yearwise')
+    >>> dtr = ds['tmax'].data - ds['tmin'].data
+    >>> xr_ds = ds.get_xarray()
+    """
+    if isinstance(var_types, str):
+        var_types = [var_types]
+    var_types = list(dict.fromkeys(var_types))
+    if len(var_types) == 0:
+        raise Exception("At least one variable type must be given")
+
+    # Parse start/end inputs once for all variables
+    start_day, end_day, _, _ = parse_date_input(start_yr, end_yr)
+    dtype = _check_dtype(dtype)
+
+    # Grids are set up once and shared by the variables on them
+    windows = {}
+    for var_type in var_types:
+        grid = 'rain' if var_type == 'rain' else 'temp'
+        if grid not in windows:
+            windows[grid] = _grid_window(var_type, bbox)
+        windows[var_type] = windows[grid]
+
+    def load(var_type):
+        lat_class, lon_class, lat_slice, lon_slice = windows[var_type]
+        return _load_range(var_type, start_day, end_day, fn_format, file_dir,
+                           lat_class, lon_class, lat_slice, lon_slice, dtype,
+                           workers=workers, cache_dir=cache_dir,
+                           catalog=catalog)
+
+    with ThreadPoolExecutor(max_workers=len(var_types)) as pool:
+        loaded = list(pool.map(load, var_types))
+
+    variables = dict(zip(var_types, loaded))
+    first = loaded[0]
+    return IMDDataset(variables, first.start_day, first.end_day,
+                      first.no_days)
+
+
+def extract_points(var_type, points, start_yr, end_yr=None, fn_format=None,
+                   file_dir=None, as_frame=True, dtype=np.float64,
+                   catalog=None):
+    """
+    Function to extract daily time series of many points from binary files
+
+    All points are mapped to their nearest grid cell at once and only
+    those cells are gathered from each (memory-mapped) year file, so the
+    full 3D data is never loaded.
+
+    Parameters
+    ----------
+    var_type : str
+        Three possible values.
+        1. "rain" -> input files are for daily rainfall values
+        2. "tmin" -> input files are for daily minimum temperature values
+        3. "tmax" -> input files are for daily maximum tempereature values
+
+    points : array-like
+        Sequence of (lat, lon) pairs, shape (n_points, 2).
+
+    start_yr : int or str
+        Starting year or day ('YYYY-MM-DD') for extracting data
+
+    end_yr : int or str
+        Ending year or day ('YYYY-MM-DD') for extracting data
+
+    fn_format   : str or None
+        Filename format, same as for open_data.
+
+    file_dir   : str or None
+        Directory where the files are stored, same as for open_data.
+
+    as_frame : bool
+        True : return a pandas.DataFrame indexed by date, one column per
+               point named '<lat> <lon>' (as in IMD.to_csv)
+        False: return a numpy array of shape (no_days, n_points)
+
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the returned values.
+
+    catalog : imdlib.Catalog or None
+        Catalog used to look up file names, same as for open_data.
+
+    Returns
+    -------
+    pandas.DataFrame or numpy 2D array
+        Raw values of the nearest grid cells (sentinels are kept).
+
+    Examples
+    --------
+    >>> gauges = [(19.07, 72.88), (28.61, 77.21), (13.08, 80.27)]
+    >>> ts = imd.extract_points('rain', gauges, 1991, 2020, 'yearwise')
+    """
+    lat_class, lon_class = _archive_grid(var_type)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    lat_index, lon_index = get_lat_lon_index(points[:, 0], points[:, 1],
+                                             lat_class, lon_class)
+
+    start_day, end_day, start_yr_int, end_yr_int = parse_date_input(start_yr, end_yr)
+    no_days = total_days(start_day, end_day)
+    jobs = _year_jobs(var_type, start_day, end_day, start_yr_int, end_yr_int,
+                      fn_format, file_dir, catalog)
+
+    series = np.empty((no_days, len(points)), dtype=dtype)
+    for fname, days, day_lo, day_hi, offset in jobs:
+        year_map = grd_memmap(fname, days, len(lat_class), len(lon_class))
+        # fancy indexing on the memmap gathers only the requested cells
+        series[offset:offset + day_hi - day_lo, :] = \
+            year_map[day_lo:day_hi, lat_index, lon_index]
+
+    if not as_frame:
+        return series
+    return pd.DataFrame(series,
+                        index=pd.date_range(start_day, end_day, freq='D',
+                                            name='DateTime'),
+                        columns=[str(lat) + ' ' + str(lon)
+                                 for lat, lon in points])
+
+
+def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub_dir=False, proxies=None,
+             max_workers=1, retries=3):
     """
     Function to download binary data and return an IMD class object
     time range is tuple or list or numpy array of 2 int number
@@ -1060,6 +2169,20 @@ def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub
         Give details in curly bracket as shown in the example below
         e.g. proxies = { 'http' : 'http://uname:password@ip:port'}
 
+    max_workers : int
+        Number of files downloaded concurrently over one pooled session.
+        Default 1 downloads the years one after the other.
+
+    retries : int
+        Number of times a failed download is retried, with exponential
+        backoff, before giving up. Interrupted transfers are resumed
+        where the server allows it.
+
+    Existing files are only skipped if they have the size expected for
+    the grid and year and match their entry in the manifest
+    (imdlib_manifest.json) of their directory. Only files that are new
+    or changed since the manifest was written are hashed.
+
     Returns
     -------
     IMD object
@@ -1095,6 +2218,8 @@ def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub
     _, _, start_yr_int, end_yr_int = parse_date_input(start_yr, end_yr)
 
     years = np.arange(start_yr_int, end_yr_int + 1)
+    lat, lon = _archive_grid(var_type)
+    n_cells = len(lat) * len(lon)
 
     # Handling location for saving data
     if file_dir is not None:
@@ -1118,6 +2243,7 @@ def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub
                 if not os.path.isdir(var_type):
                     os.mkdir(var_type)
 
+    jobs = []
     try:
         for year in years:
             # Setting file name
@@ -1140,22 +2266,16 @@ def get_data(var_type, start_yr, end_yr=None, fn_format=None, file_dir=None, sub
                     else:
                         fname = fini + str(year) + fend
 
-            # Skip download if file already exists and is not corrupt
-            if os.path.isfile(fname) and os.path.getsize(fname) >= 1024:
-                print("File already exists: " + fname + ". Skipping download.")
-                continue
-
-            # Setting parameters
-            print("Downloading: " + var + " for year " + str(year))
-
-            data = {var: year}
-            # Requesting the dataset
-            response = requests.post(url, data=data, proxies=proxies)
-            response.raise_for_status()
+            # Expected size: one float32 grid per day of the year
+            days = 366 if LeapYear(year) else 365
+            size = days * n_cells * GRD_DTYPE.itemsize
+            jobs.append(({var: year}, fname, var + " for year " + str(year),
+                         size))
 
-            # Saving file
-            with open(fname, 'wb') as f:
-                f.write(response.content)
+        # Skip files that already exist and are complete
+        jobs = pending_jobs(jobs)
+        download_files(url, jobs, proxies=proxies, max_workers=max_workers,
+                       retries=retries)
 
         print("Download Successful !!!")
 
@@ -0,0 +1,400 @@
+"""
+Download helpers shared by get_data and get_real_data.
+
+Files are fetched over one requests.Session, so keep-alive connections
+are pooled and reused, optionally by several threads at once. Each file
+is retried with exponential backoff and written to a temporary file that
+is renamed into place only once complete, so an interrupted run never
+leaves a truncated .grd file behind. An interrupted transfer is resumed
+from its temporary file with an HTTP Range request where the server
+allows it.
+
+Every directory holding downloaded files has a JSON manifest recording
+the byte size, modification time and SHA-256 hash of each file::
+
+    <file_dir>/imdlib_manifest.json
+
+so existing files can be validated in one parallel sweep (verify_files)
+instead of being trusted on their size alone. Files whose size and
+modification time still match their manifest entry are not read again;
+only new or changed files are hashed.
+
+Manifest updates are merged under an exclusive lock on an empty file
+next to the manifest::
+
+    <file_dir>/imdlib_manifest.json.lock
+
+It is left in place on purpose: removing it while another process waits
+on it would let two processes hold "the" lock at once.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from imdlib.util import atomic_write
+
+try:
+    import fcntl
+    has_fcntl = True
+except ImportError:
+    has_fcntl = False
+
+# HTTP status codes worth retrying (throttling and server side errors)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+MANIFEST_NAME = 'imdlib_manifest.json'
+
+# Size of the pieces files are hashed and responses are streamed in. A
+# broken transfer loses at most the piece being read.
+CHUNK_SIZE = 1 << 16
+
+# Serialises manifest updates of the threads of this process; other
+# processes are kept out with a lock file where fcntl is available
+_MANIFEST_LOCK = threading.Lock()
+
+
+def _manifest_path(directory):
+    return os.path.join(directory or '.', MANIFEST_NAME)
+
+
+def load_manifest(directory):
+    """
+    Manifest of a download directory as {file name: entry}, where entry
+    is a dict with the 'size', 'mtime_ns' and 'sha256' of the file.
+    """
+    try:
+        with open(_manifest_path(directory)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(directory, manifest):
+    """Write a manifest atomically."""
+    text = json.dumps(manifest, indent=1, sort_keys=True)
+    atomic_write(_manifest_path(directory), lambda f: f.write(text.encode()))
+
+
+def update_manifest(entries):
+    """
+    Record {path: entry} pairs in the manifests of their directories.
+
+    Each manifest is re-read and merged under a lock, so concurrent
+    updates (threads, or processes where fcntl is available) do not drop
+    each other's entries.
+    """
+    by_dir = {}
+    for fname, entry in entries.items():
+        directory, name = os.path.split(fname)
+        by_dir.setdefault(directory, {})[name] = entry
+    with _MANIFEST_LOCK:
+        for directory, new in by_dir.items():
+            with open(_manifest_path(directory) + '.lock', 'a') as lock:
+                if has_fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                manifest = load_manifest(directory)
+                manifest.update(new)
+                save_manifest(directory, manifest)
+
+
+def file_entry(fname, sha256=None):
+    """Manifest entry of a file, hashing it unless sha256 is given."""
+    stat = os.stat(fname)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256 if sha256 is not None else file_sha256(fname)}
+
+
+def file_sha256(fname):
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_file(fname, size=None, entry=None, rehash=False):
+    """
+    Validate one file against its expected size and manifest entry.
+
+    A file whose size and modification time match its manifest entry is
+    trusted without being read, unless rehash is True.
+
+    Returns
+    -------
+    status : str
+        'ok', 'missing', 'size' (wrong byte size) or 'hash' (content
+        differs from the hash recorded in the manifest).
+
+    sha256 : str or None
+        Hash of the file if it was computed.
+    """
+    if not os.path.isfile(fname):
+        return 'missing', None
+    stat = os.stat(fname)
+    actual = stat.st_size
+    if entry is not None and size is None:
+        size = entry.get('size')
+    if (size is not None and actual != size) or actual == 0:
+        return 'size', None
+    if (not rehash and entry is not None and entry.get('sha256') and
+            entry.get('size') == actual and
+            entry.get('mtime_ns') == stat.st_mtime_ns):
+        return 'ok', None
+    sha256 = file_sha256(fname)
+    if entry is not None and entry.get('sha256') not in (None, sha256):
+        return 'hash', sha256
+    return 'ok', sha256
+
+
+def verify_files(files, max_workers=None, rehash=False):
+    """
+    Validate many files in one parallel sweep.
+
+    Parameters
+    ----------
+    files : list of tuple
+        (fname, size) pairs, size being the expected number of bytes or
+        None if unknown.
+
+    max_workers : int or None
+        Number of files checked concurrently. None lets the thread pool
+        decide.
+
+    rehash : bool
+        If True, every file is hashed, even if its size and modification
+        time match its manifest entry.
+
+    Returns
+    -------
+    dict
+        Status of every file, see check_file. Files found complete but
+        not yet listed in their manifest (or changed since, with the same
+        content) are added to it.
+    """
+    manifests = {}
+    for fname, _ in files:
+        directory = os.path.dirname(fname)
+        if directory not in manifests:
+            manifests[directory] = load_manifest(directory)
+
+    def check(item):
+        fname, size = item
+        directory, name = os.path.split(fname)
+        return check_file(fname, size, manifests[directory].get(name),
+                          rehash)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(check, files))
+
+    status = {}
+    new_entries = {}
+    for (fname, _), (state, sha256) in zip(files, results):
+        status[fname] = state
+        if state == 'ok' and sha256 is not None:
+            new_entries[fname] = file_entry(fname, sha256)
+    if new_entries:
+        update_manifest(new_entries)
+    return status
+
+
+def pending_jobs(jobs, max_workers=None):
+    """
+    Download jobs whose files are missing, incomplete or corrupt.
+
+    All existing files are validated in one parallel sweep against the
+    expected size of their job and their manifest entry; only files that
+    are new or changed since the manifest was written are hashed.
+
+    Parameters
+    ----------
+    jobs : list of tuple
+        (form, fname, label, size) for every file, see download_file.
+
+    max_workers : int or None
+        Number of files checked concurrently.
+
+    Returns
+    -------
+    list of tuple
+        The jobs that still need to be downloaded, in order.
+    """
+    status = verify_files([(job[1], job[3]) for job in jobs], max_workers)
+    pending = []
+    for job in jobs:
+        fname = job[1]
+        if status[fname] == 'ok':
+            print("File already exists: " + fname + ". Skipping download.")
+            continue
+        if status[fname] != 'missing':
+            print("File is incomplete or corrupt: " + fname +
+                  ". Downloading again.")
+        pending.append(job)
+    return pending
+
+
+def make_session(max_workers=1, proxies=None):
+    """requests.Session with a connection pool sized for max_workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers,
+                          pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if proxies is not None:
+        session.proxies.update(proxies)
+    return session
+
+
+def download_file(session, url, form, fname, label, size=None, retries=3,
+                  backoff=1.0, timeout=None):
+    """
+    Download one file with retries, resuming and an atomic write.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session used for the request.
+
+    url : str
+        Address the form is posted to.
+
+    form : dict
+        Form data of the POST request (e.g. {'rain': 2018}).
+
+    fname : str
+        Destination file name.
+
+    label : str
+        Description used in messages (e.g. 'year 2018').
+
+    size : int or None
+        Expected size of the file in bytes. A download of another size
+        is discarded and retried.
+
+    retries : int
+        Number of additional attempts after a failed one.
+
+    backoff : float
+        Delay in seconds before the first retry, doubled for every
+        following retry.
+
+    timeout : float or None
+        Timeout of a single request in seconds.
+
+    Returns
+    -------
+    dict
+        Manifest entry ('size', 'mtime_ns' and 'sha256') of the
+        downloaded file.
+    """
+    tmp_name = fname + '.part'
+    for attempt in range(retries + 1):
+        # Resume from what an earlier attempt or run left behind
+        offset = os.path.getsize(tmp_name) if os.path.isfile(tmp_name) else 0
+        if size is not None and offset >= size:
+            offset = 0
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset else None
+        try:
+            with session.post(url, data=form, headers=headers, stream=True,
+                              timeout=timeout) as response:
+                if response.status_code == 416:
+                    # stale partial file the server cannot resume from
+                    os.remove(tmp_name)
+                    continue
+                response.raise_for_status()
+                mode = 'ab' if offset and response.status_code == 206 else 'wb'
+                with open(tmp_name, mode) as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+        except requests.exceptions.RequestException as e:
+            response_status = getattr(e.response, 'status_code', None)
+            retriable = (response_status is None or
+                         response_status in RETRY_STATUS)
+            if not retriable or attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            continue
+
+        written = os.path.getsize(tmp_name)
+        if written < 1:
+            os.remove(tmp_name)
+            raise Exception("Error in file download. \nData not downloaded "
+                            "for {}. \nStopping IMDLIB".format(label))
+        if size is None or written == size:
+            break
+        # Complete response of the wrong size: start again from scratch
+        os.remove(tmp_name)
+        if attempt == retries:
+            raise Exception("Error in file download, mismatch in size of "
+                            "data-length for {} (expected {} bytes, got {})"
+                            .format(label, size, written))
+        time.sleep(backoff * 2 ** attempt)
+    else:
+        raise Exception("Error in file download. \nData not downloaded "
+                        "for {}. \nStopping IMDLIB".format(label))
+
+    sha256 = file_sha256(tmp_name)
+    os.replace(tmp_name, fname)
+    return file_entry(fname, sha256)
+
+
+def download_files(url, jobs, proxies=None, max_workers=1, retries=3,
+                   backoff=1.0, timeout=None):
+    """
+    Download several files over a shared, pooled session.
+
+    Parameters
+    ----------
+    url : str
+        Address the forms are posted to.
+
+    jobs : list of tuple
+        (form, fname, label, size) for every file, see download_file.
+
+    proxies : dict or None
+        Proxies used by the session.
+
+    max_workers : int
+        Maximum number of concurrent downloads.
+
+    retries, backoff, timeout :
+        Passed on to download_file.
+
+    Raises the error of the first failed file (in job order) once all
+    started downloads have finished. Files downloaded before the error
+    are still recorded in the manifests of their directories.
+    """
+    max_workers = max(1, int(max_workers or 1))
+    entries = {}
+    with make_session(max_workers, proxies) as session:
+        def fetch(job):
+            form, fname, label, size = job
+            print("Downloading: " + label)
+            entries[fname] = download_file(session, url, form, fname, label,
+                                           size, retries, backoff, timeout)
+
+        try:
+            if max_workers == 1:
+                for job in jobs:
+                    fetch(job)
+                return
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(fetch, job) for job in jobs]
+                try:
+                    for future in futures:
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            if entries:
+                update_manifest(entries)
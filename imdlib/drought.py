@@ -330,11 +330,11 @@ def spi(imd_obj, **kwargs):
     if cal_end - cal_start + 1 < 10:
         raise Exception('Calibration period must be at least 10 years')
 
-    # Rolling accumulation
-    accum = np.ones_like(mon_data) * np.nan
+    # Rolling accumulation (float64 for the distribution fits)
+    accum = np.full(mon_data.shape, np.nan, dtype=np.float64)
     for t in range(timescale - 1, n_months):
         window = mon_data[t - timescale + 1:t + 1, :, :]
-        accum[t, :, :] = np.nansum(window, axis=0)
+        accum[t, :, :] = np.nansum(window, axis=0, dtype=np.float64)
         all_nan = np.all(np.isnan(window), axis=0)
         accum[t, all_nan] = np.nan
 
@@ -342,8 +342,8 @@ def spi(imd_obj, **kwargs):
     cal_start_idx = (cal_start - data_start_yr) * 12
     cal_end_idx = (cal_end - data_start_yr + 1) * 12
 
-    # Result array
-    spi_data = np.ones_like(accum) * np.nan
+    # Result array (same precision as the input data)
+    spi_data = np.full(accum.shape, np.nan, dtype=mon_data.dtype)
 
     # Fit per cell, per calendar month
     for i in range(lon_size):
@@ -497,11 +497,11 @@ def spei(imd_obj, **kwargs):
     # --- Water balance: D = P - PET ---
     water_balance = mon_precip - pet_025
 
-    # --- Rolling accumulation ---
-    accum = np.ones_like(water_balance) * np.nan
+    # --- Rolling accumulation (float64 for the distribution fits) ---
+    accum = np.full(water_balance.shape, np.nan, dtype=np.float64)
     for t in range(timescale - 1, n_months):
         window = water_balance[t - timescale + 1:t + 1, :, :]
-        accum[t, :, :] = np.nansum(window, axis=0)
+        accum[t, :, :] = np.nansum(window, axis=0, dtype=np.float64)
         all_nan = np.all(np.isnan(window), axis=0)
         accum[t, all_nan] = np.nan
 
@@ -510,8 +510,8 @@ def spei(imd_obj, **kwargs):
     cal_end_idx = (cal_end - data_start_yr + 1) * 12
 
     # Result array
-    spei_data = np.ones((n_months, lon_size, lat_size),
-                        dtype=np.float64) * np.nan
+    spei_data = np.full((n_months, lon_size, lat_size), np.nan,
+                        dtype=mon_precip.dtype)
 
     # Fit per cell, per calendar month
     for i in range(lon_size):
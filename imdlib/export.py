@@ -0,0 +1,380 @@
+"""
+File writers for IMD objects that stream the data block by block.
+
+The full masked (time, lat, lon) cube is never built: every block of
+time steps (a calendar year when streaming) is converted, written and
+released before the next one.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from imdlib.naming import COORD_ATTRS, GLOBAL_ATTRS
+from imdlib.util import float_dtype
+
+try:
+    import netCDF4
+    has_netcdf4 = True
+except ImportError:
+    has_netcdf4 = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    has_pyarrow = True
+except ImportError:
+    has_pyarrow = False
+try:
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.shutil import copy as rio_copy
+    from rasterio.transform import Affine
+    has_rasterio = True
+except ImportError:
+    has_rasterio = False
+
+
+def year_blocks(time):
+    """(start, end) index pairs of the calendar years of a time index."""
+    years = np.asarray(time.year)
+    bounds = np.concatenate(([0], np.nonzero(np.diff(years))[0] + 1,
+                             [len(years)]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def netcdf_chunks(n_time, n_lat, n_lon):
+    """
+    Default chunk shape: a year of time steps on a small spatial tile,
+    so reading the full series of one point touches few chunks.
+    """
+    return (max(1, min(n_time, 365)), min(n_lat, 16), min(n_lon, 16))
+
+
+def write_netcdf(obj, outname, chunks=None, compression='zlib', complevel=4,
+                 stream=True, append=False):
+    """
+    Write an IMD object to a NetCDF4 file with netCDF4.
+
+    Parameters
+    ----------
+    obj : IMD object
+        Data to write.
+
+    outname : str
+        Path of the NetCDF file.
+
+    chunks : tuple of 3 int or None
+        (time, lat, lon) chunk shape of the variable. Defaults to
+        netcdf_chunks.
+
+    compression : str or None
+        Compression of the variable, e.g. 'zlib' or 'zstd' (any value
+        supported by netCDF4.Dataset.createVariable). None writes
+        uncompressed data.
+
+    complevel : int
+        Compression level.
+
+    stream : bool
+        If True, data is converted and written one calendar year at a
+        time, so memory use is bounded by one year. Otherwise it is
+        written in one block.
+
+    append : bool
+        If True and outname exists, the time steps are appended along its
+        unlimited time dimension. The file must hold the same variable on
+        the same grid and end before the first time step of obj.
+    """
+    if not has_netcdf4:
+        raise Exception("netCDF4 is not installed")
+
+    time = obj._time_index()
+    n_time, n_lon, n_lat = obj.data.shape
+    if chunks is None:
+        chunks = netcdf_chunks(n_time, n_lat, n_lon)
+    dtype = float_dtype(obj.data)
+
+    if append and os.path.isfile(outname):
+        nc = netCDF4.Dataset(outname, 'a')
+        try:
+            if obj.var_name not in nc.variables:
+                raise Exception("Error in appending, {} has no variable {}"
+                                .format(outname, obj.var_name))
+            if (nc.dimensions['lat'].size, nc.dimensions['lon'].size) != \
+                    (n_lat, n_lon):
+                raise Exception("Error in appending, grid of {} does not "
+                                "match the data".format(outname))
+        except Exception:
+            nc.close()
+            raise
+    else:
+        nc = netCDF4.Dataset(outname, 'w', format='NETCDF4')
+        nc.createDimension('time', None)
+        nc.createDimension('lat', n_lat)
+        nc.createDimension('lon', n_lon)
+        tvar = nc.createVariable('time', 'f8', ('time',))
+        tvar.setncatts(COORD_ATTRS['time'])
+        tvar.units = 'days since {:%Y-%m-%d 00:00:00}'.format(time[0])
+        tvar.calendar = 'proleptic_gregorian'
+        for name, values in (('lat', obj.lat_array), ('lon', obj.lon_array)):
+            var = nc.createVariable(name, 'f8', (name,))
+            var.setncatts(COORD_ATTRS[name])
+            var[:] = values
+        var = nc.createVariable(obj.var_name, dtype, ('time', 'lat', 'lon'),
+                                compression=compression, complevel=complevel,
+                                shuffle=compression is not None,
+                                chunksizes=chunks, fill_value=np.nan)
+        var.units = obj.var_units
+        var.long_name = obj.var_long_name
+        nc.setncatts(GLOBAL_ATTRS)
+        nc.history = str(datetime.utcnow()) + ' Python'
+
+    try:
+        tvar = nc.variables['time']
+        var = nc.variables[obj.var_name]
+        offset = len(tvar)
+        values = netCDF4.date2num(time.to_pydatetime(), tvar.units,
+                                  getattr(tvar, 'calendar', 'standard'))
+        if offset > 0 and values[0] <= tvar[offset - 1]:
+            raise Exception("Error in appending, {} already holds data up to "
+                            "or after {}".format(outname, time[0].date()))
+        blocks = year_blocks(time) if stream else [(0, n_time)]
+        for t0, t1 in blocks:
+            var[offset + t0:offset + t1, :, :] = obj._swapped_block(t0, t1)
+            tvar[offset + t0:offset + t1] = values[t0:t1]
+    finally:
+        nc.close()
+
+
+def land_cells(obj):
+    """
+    (lat index, lon index) arrays of the cells written by table exports:
+    the land_mask cells, or every cell if there is no land_mask. Cells
+    are ordered by latitude, then longitude.
+    """
+    if obj.land_mask is None:
+        mask = np.ones(obj.data.shape[1:], dtype=bool)
+    else:
+        mask = obj.land_mask
+    return np.nonzero(mask.T)
+
+
+def cell_block(obj, t0, t1, lat_idx, lon_idx):
+    """Time steps t0..t1 of the given cells as a (time, cell) array."""
+    values = obj.data[t0:t1, lon_idx, lat_idx].astype(float_dtype(obj.data),
+                                                     copy=False)
+    if not obj.computed:
+        values[values == obj._sentinel()] = np.nan
+    return values
+
+
+def table_blocks(obj, layout='long'):
+    """
+    Yield the data of the land cells as one DataFrame per calendar year.
+
+    Parameters
+    ----------
+    obj : IMD object
+        Data to convert.
+
+    layout : str
+        'long' gives (time, lat, lon, <var_name>) rows, one per time step
+        and cell. 'wide' gives one row per time step with a 'time' column
+        and a column per cell, named '<lat> <lon>'.
+    """
+    if layout not in ('long', 'wide'):
+        raise Exception("Error in layout, it must be 'long' or 'wide'")
+    time = obj._time_index()
+    lat_idx, lon_idx = land_cells(obj)
+    lats = np.asarray(obj.lat_array)[lat_idx]
+    lons = np.asarray(obj.lon_array)[lon_idx]
+    n_cells = len(lat_idx)
+    if layout == 'wide':
+        columns = ['{} {}'.format(lat, lon) for lat, lon in zip(lats, lons)]
+    for t0, t1 in year_blocks(time):
+        values = cell_block(obj, t0, t1, lat_idx, lon_idx)
+        if layout == 'long':
+            yield pd.DataFrame({'time': np.repeat(time[t0:t1], n_cells),
+                                'lat': np.tile(lats, t1 - t0),
+                                'lon': np.tile(lons, t1 - t0),
+                                obj.var_name: values.ravel()})
+        else:
+            block = pd.DataFrame(values, columns=columns)
+            block.insert(0, 'time', time[t0:t1])
+            yield block
+
+
+def write_csv(obj, outname, layout='long', float_format='%.4f'):
+    """
+    Write the land cells of an IMD object to a CSV file, year by year.
+
+    See table_blocks for the layouts.
+    """
+    with open(outname, 'w', newline='') as f:
+        for i, block in enumerate(table_blocks(obj, layout)):
+            block.to_csv(f, index=False, header=i == 0,
+                         float_format=float_format, date_format='%Y-%m-%d')
+
+
+def write_parquet(obj, outname, layout='long', compression='snappy'):
+    """
+    Write the land cells of an IMD object to a Parquet file with one row
+    group per year.
+
+    See table_blocks for the layouts.
+    """
+    if not has_pyarrow:
+        raise Exception("pyarrow is not installed")
+    writer = None
+    try:
+        for block in table_blocks(obj, layout):
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(outname, table.schema,
+                                          compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _overview_factors(height, width, min_size=8):
+    """Overview decimation factors down to about min_size cells."""
+    factors = []
+    factor = 2
+    while min(height, width) // factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def write_cog(obj, outname, t0=0, t1=None, compression='deflate',
+              blocksize=256, overviews=True, block_days=32):
+    """
+    Write time steps t0..t1 of an IMD object to a Cloud-Optimized GeoTIFF
+    with one band per time step.
+
+    Bands are written block_days at a time into a tiled, compressed
+    temporary GeoTIFF, internal overviews are added, and the file is then
+    copied into the COG layout, so memory use is bounded by one block.
+    Rows are written north up, missing cells as NaN (the nodata value),
+    and every band is described by its date.
+
+    Parameters
+    ----------
+    obj : IMD object
+        Data to write.
+
+    outname : str
+        Path of the GeoTIFF.
+
+    t0, t1 : int
+        Range of time steps to write; t1 defaults to the last one.
+
+    compression : str or None
+        GDAL compression, e.g. 'deflate', 'lzw' or 'zstd'.
+
+    blocksize : int
+        Tile size in pixels, a multiple of 16.
+
+    overviews : bool
+        If True, average overviews are built down to about 8 cells.
+
+    block_days : int
+        Number of bands converted and written at a time.
+    """
+    if not has_rasterio:
+        raise Exception("rasterio is not installed")
+    if t1 is None:
+        t1 = obj.data.shape[0]
+    time = obj._time_index()
+    lat = np.asarray(obj.lat_array)
+    lon = np.asarray(obj.lon_array)
+    x_res = float(lon[1] - lon[0]) if len(lon) > 1 else 1.0
+    y_res = float(lat[1] - lat[0]) if len(lat) > 1 else 1.0
+    profile = {'driver': 'GTiff', 'count': t1 - t0,
+               'height': len(lat), 'width': len(lon),
+               'dtype': float_dtype(obj.data).name,
+               'crs': 'EPSG:4326', 'nodata': np.nan,
+               'transform': Affine(x_res, 0.0, lon.min() - x_res / 2,
+                                   0.0, -y_res, lat.max() + y_res / 2),
+               'tiled': True, 'blockxsize': blocksize,
+               'blockysize': blocksize, 'interleave': 'band'}
+    if compression is not None:
+        profile['compress'] = compression
+
+    tmp_name = outname + '.tmp.tif'
+    try:
+        with rasterio.open(tmp_name, 'w', **profile) as dst:
+            for b0 in range(t0, t1, block_days):
+                b1 = min(b0 + block_days, t1)
+                # (time, lat, lon) with latitude ascending -> north up
+                dst.write(obj._swapped_block(b0, b1)[:, ::-1, :],
+                          indexes=list(range(b0 - t0 + 1, b1 - t0 + 1)))
+            for band, day in enumerate(time[t0:t1], 1):
+                dst.set_band_description(band, str(day.date()))
+            if overviews:
+                factors = _overview_factors(len(lat), len(lon))
+                if factors:
+                    dst.build_overviews(factors, Resampling.average)
+        options = {'BLOCKSIZE': blocksize,
+                   'OVERVIEWS': 'FORCE_USE_EXISTING' if overviews else 'NONE'}
+        if compression is not None:
+            options['COMPRESS'] = compression
+        rio_copy(tmp_name, outname, driver='COG', **options)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def write_geotiffs(obj, root, ext, split=None, workers=1, **kwargs):
+    """
+    Write an IMD object to one or more Cloud-Optimized GeoTIFFs.
+
+    Parameters
+    ----------
+    obj : IMD object
+        Data to write.
+
+    root, ext : str
+        Path of the file(s) without and with extension.
+
+    split : str or None
+        None    : one file '<root><ext>' with a band per time step.
+        'year'  : one file per calendar year, '<root>_<YYYY><ext>'.
+        'day'   : one file per time step, '<root>_<YYYY-MM-DD><ext>'.
+
+    workers : int
+        Number of files written in parallel.
+
+    kwargs : passed on to write_cog.
+
+    Returns
+    -------
+    list of str
+        Paths of the written files.
+    """
+    time = obj._time_index()
+    if split is None:
+        jobs = [(root + ext, 0, len(time))]
+    elif split == 'year':
+        jobs = [("{}_{}{}".format(root, time[t0].year, ext), t0, t1)
+                for t0, t1 in year_blocks(time)]
+    elif split == 'day':
+        jobs = [("{}_{}{}".format(root, day.date(), ext), t, t + 1)
+                for t, day in enumerate(time)]
+    else:
+        raise Exception("Error in split, it must be None, 'year' or 'day'")
+
+    def write(job):
+        outname, t0, t1 = job
+        write_cog(obj, outname, t0, t1, **kwargs)
+        return outname
+
+    if workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(write, jobs))
+    return [write(job) for job in jobs]
@@ -17,6 +17,7 @@ References:
 
 import numpy as np
 import os
+from imdlib.util import float_dtype
 
 # Path to bundled region mask
 _DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
@@ -141,7 +142,7 @@ def _detect_events(imd_obj, event_type, output, count, norm_start, norm_end):
     region_mask = _load_region_mask()
 
     # --- Prepare data: replace sentinel with NaN ---
-    nan_hint = imd_obj.data[0, 0, 0]
+    nan_hint = imd_obj._sentinel()
     work_data = imd_obj.data.copy()
     work_data[work_data == nan_hint] = np.nan
 
@@ -159,7 +160,7 @@ def _detect_events(imd_obj, event_type, output, count, norm_start, norm_end):
         norm_obj = get_data(imd_obj.cat, norm_start, norm_end,
                             fn_format='yearwise')
         norm_data = norm_obj.data.copy()
-        norm_data[norm_data == norm_obj.data[0, 0, 0]] = np.nan
+        norm_data[norm_data == norm_obj._sentinel()] = np.nan
         norm_start_day = norm_obj.start_day
         norm_no_days = norm_obj.no_days
 
@@ -175,7 +176,8 @@ def _detect_events(imd_obj, event_type, output, count, norm_start, norm_end):
     lat_size = imd_obj.data.shape[2]
 
     # Result: 0=none, 1=event, 2=severe
-    result = np.zeros((n_days, lon_size, lat_size), dtype=np.float64)
+    result = np.zeros((n_days, lon_size, lat_size),
+                      dtype=float_dtype(imd_obj.data))
 
     # Pre-compute region masks for vectorized operations
     plains = (region_mask == 0)
@@ -277,8 +279,8 @@ def _detect_events(imd_obj, event_type, output, count, norm_start, norm_end):
         bk_list = bk_point(imd_obj)
         n_years = bk_list.shape[0]
 
-        annual = np.ones((n_years, lon_size, lat_size),
-                         dtype=np.float64) * np.nan
+        annual = np.full((n_years, lon_size, lat_size), np.nan,
+                         dtype=result.dtype)
 
         for i in range(n_years):
             if i == 0:
@@ -287,11 +289,11 @@ def _detect_events(imd_obj, event_type, output, count, norm_start, norm_end):
                 year_data = result[bk_list[i-1]:bk_list[i], :, :]
 
             if count == 'total':
-                annual[i, :, :] = np.nansum(year_data >= 1, axis=0).astype(np.float64)
+                annual[i, :, :] = np.nansum(year_data >= 1, axis=0)
             elif count in ('hw', 'cw'):
-                annual[i, :, :] = np.nansum(year_data == 1, axis=0).astype(np.float64)
+                annual[i, :, :] = np.nansum(year_data == 1, axis=0)
             elif count == 'severe':
-                annual[i, :, :] = np.nansum(year_data == 2, axis=0).astype(np.float64)
+                annual[i, :, :] = np.nansum(year_data == 2, axis=0)
 
         # Re-apply masks to annual output
         annual[:, ocean] = np.nan
@@ -0,0 +1,259 @@
+"""
+Low-level access to IMD binary (.grd) files.
+
+Every IMD binary file is a flat sequence of native float32 values laid
+out day by day, each day being a (lat, lon) record in C order.  The
+helpers here expose that layout as NumPy arrays in the (time, lon, lat)
+orientation used by the IMD class.
+"""
+
+import os
+import numpy as np
+
+# Data type of values stored in IMD binary files
+GRD_DTYPE = np.dtype('f')
+
+
+def grd_memmap(fname, days, lat_size, lon_size):
+    """
+    Open a binary file as a read-only memory map.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the binary file.
+
+    days : int
+        Number of daily records expected in the file.
+
+    lat_size, lon_size : int
+        Grid dimensions of a single daily record.
+
+    Returns
+    -------
+    numpy.memmap
+        Read-only array of shape (days, lat_size, lon_size).
+    """
+    nlen = days * lat_size * lon_size
+    # Check consistency of data points
+    if os.stat(fname).st_size // GRD_DTYPE.itemsize != nlen:
+        raise Exception("Error in file reading,"
+                        "mismatch in size of data-length")
+    return np.memmap(fname, dtype=GRD_DTYPE, mode='r',
+                     shape=(days, lat_size, lon_size))
+
+
+def read_grd(fname, days, lat_size, lon_size, out, buf=None,
+             day_lo=0, day_hi=None, lat_slice=None, lon_slice=None):
+    """
+    Decode a binary file straight into a (days, lon, lat) output slice.
+
+    Every day is a fixed-size record, so only the records from day_lo up
+    to day_hi are read: the file is positioned with a seek and the byte
+    range is read with a single ``readinto`` call into a flat float32
+    buffer. The (days, lat, lon) -> (days, lon, lat) transpose is done
+    as one strided copy into ``out``, so no intermediate Python objects
+    or temporary arrays are created.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the binary file.
+
+    days : int
+        Number of daily records expected in the file.
+
+    lat_size, lon_size : int
+        Grid dimensions of a single daily record.
+
+    out : numpy 3D array
+        Destination of shape (day_hi - day_lo, lon_size, lat_size),
+        usually a slice of a larger preallocated array.
+
+    buf : numpy 1D array, optional
+        Reusable float32 buffer with enough elements for the records that
+        are read. Allocated on the fly if not given.
+
+    day_lo, day_hi : int, optional
+        0-based range of days to read, end exclusive. Defaults to the
+        whole file.
+
+    lat_slice, lon_slice : slice, optional
+        Grid window to read. When only part of the grid is requested the
+        file is memory-mapped and just the needed latitude rows of each
+        day are touched; ``out`` then has the shape of the window.
+    """
+    if day_hi is None:
+        day_hi = days
+    if not _is_full(lat_slice, lat_size) or not _is_full(lon_slice, lon_size):
+        window = grd_memmap(fname, days, lat_size, lon_size)[
+            day_lo:day_hi, lat_slice, lon_slice]
+        out[...] = np.transpose(window, (0, 2, 1))
+        return out
+    n_cells = lat_size * lon_size
+    # Check consistency of data points
+    if os.stat(fname).st_size // GRD_DTYPE.itemsize != days * n_cells:
+        raise Exception("Error in file reading,"
+                        "mismatch in size of data-length")
+    nlen = (day_hi - day_lo) * n_cells
+    if buf is None:
+        buf = np.empty(nlen, dtype=GRD_DTYPE)
+    else:
+        buf = buf[:nlen]
+    with open(fname, 'rb') as f:
+        f.seek(day_lo * n_cells * GRD_DTYPE.itemsize)
+        if f.readinto(buf) != buf.nbytes:
+            raise Exception("Error in file reading,"
+                            "mismatch in size of data-length")
+    out[...] = np.transpose(buf.reshape(day_hi - day_lo, lat_size, lon_size),
+                            (0, 2, 1))
+    return out
+
+
+def write_grd(f, block, sentinel):
+    """
+    Write (days, lon, lat) values to an open binary file as IMD records.
+
+    Every day is written as a native float32 (lat, lon) record in C
+    order, the layout read by grd_memmap and read_grd. NaN values are
+    written as ``sentinel``.
+
+    Parameters
+    ----------
+    f : file object
+        Binary file opened for writing, positioned where the records go.
+
+    block : numpy 3D array
+        Values of shape (days, lon_size, lat_size).
+
+    sentinel : float
+        Value stored for missing (NaN) cells.
+    """
+    records = np.transpose(block, (0, 2, 1)).astype(GRD_DTYPE, order='C')
+    records[np.isnan(records)] = sentinel
+    records.tofile(f)
+
+
+def _is_full(window, size):
+    """True if a slice (or None) selects a whole axis of the given size."""
+    return window is None or window.indices(size) == (0, size, 1)
+
+
+class GrdStack(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    Read-only virtual concatenation of (time, lon, lat) arrays along time.
+
+    Used by ``open_data(..., lazy=True)`` to present several memory-mapped
+    year files as a single 3D array.  Nothing is read from disk until the
+    stack is indexed; indexing returns an in-memory numpy array holding
+    only the requested part.
+
+    Parameters
+    ----------
+    blocks : list of array-like
+        Arrays of shape (days_i, lon_size, lat_size), stacked in order.
+
+    dtype : numpy dtype, optional
+        Type of the arrays returned by indexing. Defaults to the common
+        type of the blocks.
+    """
+
+    def __init__(self, blocks, dtype=None):
+        if len(blocks) == 0:
+            raise ValueError('GrdStack needs at least one block')
+        spatial = blocks[0].shape[1:]
+        for block in blocks:
+            if block.ndim != 3 or block.shape[1:] != spatial:
+                raise ValueError('All blocks must be 3D with the same grid')
+        self._blocks = list(blocks)
+        lengths = [block.shape[0] for block in self._blocks]
+        self._offsets = np.concatenate(([0], np.cumsum(lengths)))
+        if dtype is None:
+            dtype = np.result_type(*[block.dtype for block in self._blocks])
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def shape(self):
+        return (int(self._offsets[-1]),) + self._blocks[0].shape[1:]
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return 'GrdStack(shape={}, dtype={}, blocks={})'.format(
+            self.shape, self.dtype, len(self._blocks))
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis or k is None for k in key):
+            return np.asarray(self)[key]
+        tkey, rest = key[0], key[1:]
+        n_time = self.shape[0]
+
+        if isinstance(tkey, (int, np.integer)):
+            t = int(tkey)
+            if t < 0:
+                t += n_time
+            if not 0 <= t < n_time:
+                raise IndexError('index {} is out of bounds for axis 0 '
+                                 'with size {}'.format(tkey, n_time))
+            b = np.searchsorted(self._offsets, t, side='right') - 1
+            return np.array(self._blocks[b][(t - self._offsets[b],) + rest],
+                            dtype=self.dtype)
+
+        # Resolve time selection to absolute indices
+        idx = np.arange(n_time)[tkey]
+        pieces = []
+        positions = []
+        for b, block in enumerate(self._blocks):
+            lo, hi = self._offsets[b], self._offsets[b + 1]
+            sel = np.nonzero((idx >= lo) & (idx < hi))[0]
+            if len(sel) == 0:
+                continue
+            local = idx[sel] - lo
+            if len(local) == 1 or np.all(np.diff(local) == 1):
+                # contiguous run: plain slicing keeps memmap reads sequential
+                tsel = slice(local[0], local[-1] + 1)
+            else:
+                tsel = local
+            pieces.append(block[(tsel,) + rest])
+            positions.append(sel)
+
+        if len(pieces) == 0:
+            return np.asarray(self._blocks[0][(slice(0, 0),) + rest],
+                              dtype=self.dtype)
+        out = np.empty((len(idx),) + pieces[0].shape[1:], dtype=self.dtype)
+        for sel, piece in zip(positions, pieces):
+            out[sel] = piece
+        return out
+
+    def __setitem__(self, key, value):
+        raise TypeError('Lazily opened data is read-only; '
+                        'call IMD.load() to bring it into memory first')
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[:]
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(np.asarray(x) if isinstance(x, GrdStack) else x
+                       for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def copy(self):
+        """Return the whole stack as an in-memory numpy array."""
+        return self[:]
+
+    def astype(self, dtype, copy=True):
+        return np.asarray(self, dtype=dtype)
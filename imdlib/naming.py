@@ -32,3 +32,22 @@ VAR_METADATA = {
     'spi':    {'var_name': 'spi',    'units': '',         'long_name': 'Standardized Precipitation Index'},
     'spei':   {'var_name': 'spei',   'units': '',         'long_name': 'Standardized Precipitation Evapotranspiration Index'},
 }
+
+# CF attributes of the coordinates and datasets written by imdlib
+# (IMD.get_xarray and the file exporters).
+COORD_ATTRS = {
+    'time': {'standard_name': 'time', 'long_name': 'time'},
+    'lon':  {'axis': 'X', 'standard_name': 'longitude', 'long_name': 'longitude',
+             'units': 'degrees_east'},
+    'lat':  {'axis': 'Y', 'standard_name': 'latitude', 'long_name': 'latitude',
+             'units': 'degrees_north'},
+}
+
+GLOBAL_ATTRS = {
+    'Conventions': 'CF-1.7',
+    'title': 'IMD gridded data',
+    'source': 'https://imdpune.gov.in/',
+    'references': '',
+    'comment': '',
+    'crs': 'epsg:4326',
+}
@@ -1,12 +1,42 @@
-import array
 import numpy as np
 import pandas as pd
 import os
 import requests
-from imdlib.core import IMD
+from imdlib.core import IMD, _any_nonzero, _read_years, _sentinel_mask
+from imdlib.download import download_files, pending_jobs
+from imdlib.grd import GRD_DTYPE
+from imdlib.store import append_days, read_store, stored_days
 from imdlib.util import get_filename_realtime
 
-def open_real_data(var_type, start_dy, end_dy=None, file_dir=None):
+def _real_grid(var_type):
+    """
+    Latitude and longitude arrays of the real-time grid for var_type.
+    """
+    if var_type == 'rain':
+        lat_size_rain = 129
+        lon_size_rain = 135
+        lat_rain = np.linspace(6.5, 38.5, lat_size_rain)
+        lon_rain = np.linspace(66.5, 100.0, lon_size_rain)
+        return lat_rain, lon_rain
+    elif var_type == 'tmin' or var_type == 'tmax':
+        lat_size_temp = 61
+        lon_size_temp = 61
+        lat_temp = np.linspace(7.5, 37.5, lat_size_temp)
+        lon_temp = np.linspace(67.5, 97.5, lon_size_temp)
+        return lat_temp, lon_temp
+    elif var_type == 'rain_gpm':
+        lat_size_gpm = 281
+        lon_size_gpm = 241
+        lat_gpm = np.linspace(-30.0, 40.0, lat_size_gpm)
+        lon_gpm = np.linspace(50.0, 110.0, lon_size_gpm)
+        return lat_gpm, lon_gpm
+    else:
+        raise Exception("Error in variable type declaration."
+                        "It must be 'rain'/'rain_gpm'/'tmin'/'tmax'. ")
+
+
+def open_real_data(var_type, start_dy, end_dy=None, file_dir=None,
+                   dtype=np.float64, store_dir=None, workers=None, catalog=None):
 
     """
 
@@ -35,26 +65,30 @@ def open_real_data(var_type, start_dy, end_dy=None, file_dir=None):
         Directory where files are stored.
         If None, the currently working directory is used.
 
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of IMD.data. Use numpy.float32 to keep the
+        values exactly as stored in the files at half the memory.
+
+    store_dir : str or None
+        Directory of an appendable store filled by
+        get_real_data(..., store_dir=...). If given, the days are read
+        from the store in one go instead of from the daily files.
+
+    workers : int or None
+        Number of threads used to read the daily files concurrently, as
+        for open_data. None or 1 (the default) reads the days one after
+        the other.
+
+    catalog : imdlib.Catalog or None
+        Catalog of file_dir. If given, file names are looked up in it
+        instead of being built and checked on disk.
+
     Returns
     -------
     IMD object
 
     """
 
-    lat_size_rain = 129
-    lon_size_rain = 135
-    lat_rain = np.linspace(6.5, 38.5, lat_size_rain)
-    lon_rain = np.linspace(66.5, 100.0, lon_size_rain)
-
-    lat_size_temp = 61
-    lon_size_temp = 61
-    lat_temp = np.linspace(7.5, 37.5, lat_size_temp)
-    lon_temp = np.linspace(67.5, 97.5, lon_size_temp)
-
-    lat_size_gpm = 281
-    lon_size_gpm = 241
-    lat_gpm = np.linspace(-30.0, 40.0, lat_size_gpm)
-    lon_gpm = np.linspace(50.0, 110.0, lon_size_gpm)
     #######################################
     # Format Date into <yyyy-mm-dd>
 
@@ -66,83 +100,64 @@ def open_real_data(var_type, start_dy, end_dy=None, file_dir=None):
     days = pd.date_range(start_dy, end_dy, freq='D')
 
     # Decide which variable we are looking into
-    if var_type == 'rain':
-        lat_size_class = lat_size_rain
-        lon_size_class = lon_size_rain
-    elif var_type == 'tmin' or var_type == 'tmax':
-        lat_size_class = lat_size_temp
-        lon_size_class = lon_size_temp
-    elif var_type == 'rain_gpm':
-        lat_size_class = lat_size_gpm
-        lon_size_class = lon_size_gpm
-    else:
-        raise Exception("Error in variable type declaration."
-                        "It must be 'rain'/'rain_gpm'/'tmin'/'tmax'. ")
+    lat, lon = _real_grid(var_type)
+    lat_size_class = len(lat)
+    lon_size_class = len(lon)
 
-    # Loop through all the years
-    # all_data -> container to store data for all the year
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise Exception("dtype must be a floating point type, "
+                        "got {}".format(dtype))
+
+    # all_data -> container to store data for all the days
     # all_data.shape = (no_days, len(lon), len(lat))
-    all_data = np.empty((len(days), lon_size_class, lat_size_class))
-    # Counter for total days. It helps filling 'all_data' array.
-    #print(all_data.shape)
-    
-    count_day = 0
-    for day in days:
-
-        # Decide resolution of input file name
-        fname = get_filename_realtime(day, var_type, file_dir)
-
-        # temporary variable to read binary data
-        temp = array.array("f")
-        with open(fname, 'rb') as f:
-            temp.fromfile(f, os.stat(fname).st_size // temp.itemsize)
-
-        data = np.array(list(map(lambda x: x, temp)))
-        
-        # Added for new url (dated:Oct 10, 2022)
-        # Removing first element for rain for new url: https://imdpune.gov.in/lrfindex.php 
-        #if var_type == 'rain':
-        #    data = data[1:]
-        
-        nlen = lat_size_class * lon_size_class
-        # Check consistency of data points
-        if len(data) != nlen:
-            raise Exception("Error in file reading,"
-                            "mismatch in size of data-length")
-
-        # Reshape data into a shape of
-        # (days_in_year, lon_size_class, lat_size_class)
-        data = np.transpose(np.reshape(data, (1, lat_size_class,
-                                              lon_size_class), order='C'), (0, 2, 1))
-        all_data[count_day:count_day + 1, :, :] = data
-        count_day += len(data)
-        # Stack data vertically to get multi-year data
-        # if i != time_range[0]:
-        #     all_data = np.vstack((all_data, data))
-        # else:
-        #     all_data = data
+    all_data = np.empty((len(days), lon_size_class, lat_size_class),
+                        dtype=dtype)
 
-    # Create a IMD object
-    if var_type == 'rain':
-        data = IMD(all_data, 'rain', start_dy, end_dy, len(days),
-                   lat_rain, lon_rain)
-    elif var_type == 'rain_gpm':
-        data = IMD(all_data, 'rain_gpm', start_dy, end_dy, len(days),
-                   lat_gpm, lon_gpm)
-    elif var_type == 'tmin':
-        data = IMD(all_data, 'tmin', start_dy, end_dy, len(days),
-                   lat_temp, lon_temp)
-    elif var_type == 'tmax':
-        data = IMD(all_data, 'tmax', start_dy, end_dy, len(days),
-                   lat_temp, lon_temp)
+    if store_dir is not None:
+        read_store(store_dir, var_type, days, all_data)
     else:
-        raise Exception("Error in variable type declaration.\n"
-                        "It must be 'rain'/'rain_gpm'/'tmin'/'tmax'. ")
+        # Resolve every file name up front and report all missing or
+        # incomplete days together instead of failing on the first one
+        if catalog is not None:
+            known = catalog.realtime.get(var_type, {})
+            fnames = [known[day]['path'] if day in known else None
+                      for day in days]
+            absent = [str(day.date()) for day in days
+                      if day not in known or not known[day]['complete']]
+        else:
+            fnames = [get_filename_realtime(day, var_type, file_dir)
+                      for day in days]
+            size = lat_size_class * lon_size_class * GRD_DTYPE.itemsize
+            absent = [str(day.date()) for day, fname in zip(days, fnames)
+                      if not os.path.isfile(fname) or
+                      os.path.getsize(fname) != size]
+        if absent:
+            raise Exception("Error in file reading, real-time file(s) "
+                            "missing or incomplete for {} day(s): {}".format(
+                                len(absent), ', '.join(absent)))
+
+        # One single-day record per file, decoded concurrently straight
+        # into its slice of all_data
+        jobs = [(fname, 1, 0, 1, k) for k, fname in enumerate(fnames)]
+        _read_years(jobs, lat_size_class, lon_size_class, all_data, workers)
+
+    # Build land mask to identify valid grid cells (GPM rain uses the
+    # same -999 sentinel as IMD rain)
+    land_mask = _sentinel_mask('rain' if var_type == 'rain_gpm' else var_type,
+                               all_data[0, :, :])
+    if var_type in ('rain', 'rain_gpm') and len(days) >= 365:
+        land_mask = land_mask & _any_nonzero(all_data)
+
+    # Create a IMD object
+    data = IMD(all_data, var_type, start_dy, end_dy, len(days), lat, lon,
+               land_mask)
 
     return data
 
 
-def get_real_data(var_type, start_dy, end_dy=None, file_dir=None, proxies=None):
+def get_real_data(var_type, start_dy, end_dy=None, file_dir=None, proxies=None,
+                  max_workers=1, retries=3, store_dir=None):
     """
     Function to download real-time IMD data at daily timescale
 
@@ -172,7 +187,26 @@ def get_real_data(var_type, start_dy, end_dy=None, file_dir=None, proxies=None):
     proxies : dict
         Give details in curly bracket as shown in the example below
         e.g. proxies = { 'http' : 'http://uname:password@ip:port'}
-        
+
+    max_workers : int
+        Number of files downloaded concurrently over one pooled session.
+        Default 1 downloads the days one after the other.
+
+    retries : int
+        Number of times a failed download is retried, with exponential
+        backoff, before giving up. Interrupted transfers are resumed
+        where the server allows it.
+
+    Existing files are only skipped if they hold exactly one day of the
+    grid and match their entry in the manifest
+    (imdlib_manifest.json) of their directory. Only files that are new
+    or changed since the manifest was written are hashed.
+
+    store_dir : str or None
+        Directory of an appendable store of the variable. Days already in
+        the store are neither downloaded nor read again; only new days
+        are appended, and the returned data is read from the store.
+
     Returns
     -------
     IMD object
@@ -207,12 +241,21 @@ def get_real_data(var_type, start_dy, end_dy=None, file_dir=None, proxies=None):
     # no_days = total_days(start_day, end_day)
     days = pd.date_range(start_dy, end_dy, freq='D')
 
+    # Expected size of a daily file: one float32 grid
+    lat, lon = _real_grid(var_type)
+    size = len(lat) * len(lon) * GRD_DTYPE.itemsize
+
     # Handling location for saving data
     if file_dir is not None:
         if not os.path.isdir(file_dir):
             os.mkdir(file_dir)
+    if store_dir is not None:
+        new_days = days.difference(stored_days(store_dir, var_type))
+    else:
+        new_days = days
+    jobs = []
     try:
-        for day in days:
+        for day in new_days:
             if var_type == 'rain':
                 f_mid = day.strftime("%y_%m_%d")
             elif var_type == 'rain_gpm':
@@ -226,30 +269,22 @@ def get_real_data(var_type, start_dy, end_dy=None, file_dir=None, proxies=None):
             else:
                 fname = fini + f_mid + fend
 
-            # Skip download if file already exists and is not corrupt
-            if os.path.isfile(fname) and os.path.getsize(fname) >= 1024:
-                print("File already exists: " + fname + ". Skipping download.")
-                continue
-
-            # Setting parameters
-            print("Downloading: " + var + " for date " + str(day.date()))
-
-            data = {var: day.strftime("%d%m%Y")}
-            # Requesting the dataset
-            response = requests.post(url, data=data, proxies=proxies)
-            response.raise_for_status()
+            jobs.append(({var: day.strftime("%d%m%Y")}, fname,
+                         var + " for date " + str(day.date()), size))
+        fnames = [job[1] for job in jobs]
 
-            if len(response.content) < 1:
-                raise Exception("Error in file download. \nData not downloaded for date : {}. \nStopping IMDLIB".format(str(day.date())))
-                return data
-
-            # Saving file
-            with open(fname, 'wb') as f:
-                f.write(response.content)
+        # Skip files that already exist and are complete
+        jobs = pending_jobs(jobs)
+        download_files(url, jobs, proxies=proxies, max_workers=max_workers,
+                       retries=retries)
 
         print("Download Successful !!!")
 
-        data = open_real_data(var_type, start_dy, end_dy, file_dir)
+        if store_dir is not None:
+            append_days(store_dir, var_type, new_days, fnames, lat, lon)
+
+        data = open_real_data(var_type, start_dy, end_dy, file_dir,
+                              store_dir=store_dir)
         return data
 
     except requests.exceptions.HTTPError as e:
@@ -0,0 +1,183 @@
+"""
+Appendable store of real-time daily data.
+
+Daily real-time files of one variable are collected into a single
+growing binary file with the same layout as an IMD .grd file (float32
+(lat, lon) records, one per day), next to a JSON index::
+
+    <store_dir>/<var_type>.bin
+    <store_dir>/<var_type>.json
+
+Day i of the store is record i counted from the start day in the index,
+so any window is read from one memory map without opening a file per
+day. New days are written in place and the index is only rewritten once
+their records are on disk; records beyond the length in the index (e.g.
+left by an interrupted append) are ignored and overwritten later.
+Days skipped when appending are filled with NaN and listed as missing.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from imdlib.grd import GRD_DTYPE
+
+# Bump when the layout of the store changes
+STORE_VERSION = 1
+
+
+def _store_paths(store_dir, var_type):
+    base = os.path.join(store_dir, var_type)
+    return base + '.bin', base + '.json'
+
+
+def store_index(store_dir, var_type):
+    """
+    Index of the store of var_type as a dict, or None if there is none.
+
+    Keys are 'version', 'var_type', 'start_day' and 'days' (number of
+    stored days), 'lat' and 'lon' (grid start, stop and size) and
+    'missing' (ISO dates of days filled with NaN).
+    """
+    _, index_file = _store_paths(store_dir, var_type)
+    try:
+        with open(index_file) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != STORE_VERSION:
+        return None
+    return index
+
+
+def stored_days(store_dir, var_type):
+    """DatetimeIndex of the days held in the store (without missing days)."""
+    index = store_index(store_dir, var_type)
+    if index is None:
+        return pd.DatetimeIndex([])
+    days = pd.date_range(index['start_day'], periods=index['days'], freq='D')
+    return days.difference(pd.DatetimeIndex(index['missing']))
+
+
+def append_days(store_dir, var_type, days, fnames, lat, lon):
+    """
+    Write daily real-time files into the store of var_type.
+
+    Parameters
+    ----------
+    store_dir : str
+        Directory of the store. Created if needed.
+
+    var_type : str
+        'rain', 'rain_gpm', 'tmin' or 'tmax'.
+
+    days : pandas DatetimeIndex or list
+        Days to store. Days already held are overwritten.
+
+    fnames : list of str
+        Daily binary file of every day.
+
+    lat, lon : numpy 1D array
+        Grid of the daily files.
+    """
+    lat_size, lon_size = len(lat), len(lon)
+    n_bytes = lat_size * lon_size * GRD_DTYPE.itemsize
+    days = pd.DatetimeIndex(days)
+    if len(days) == 0:
+        return
+    os.makedirs(store_dir, exist_ok=True)
+    bin_file, index_file = _store_paths(store_dir, var_type)
+
+    index = store_index(store_dir, var_type)
+    if index is None:
+        index = {'version': STORE_VERSION,
+                 'var_type': var_type,
+                 'start_day': str(days.min().date()),
+                 'days': 0,
+                 'dtype': GRD_DTYPE.str,
+                 'dims': ['time', 'lat', 'lon'],
+                 'lat': {'start': float(lat[0]), 'stop': float(lat[-1]),
+                         'size': lat_size},
+                 'lon': {'start': float(lon[0]), 'stop': float(lon[-1]),
+                         'size': lon_size},
+                 'missing': []}
+        # drop a data file left by an index that could not be read
+        open(bin_file, 'wb').close()
+    elif (index['lat']['size'], index['lon']['size']) != (lat_size, lon_size):
+        raise Exception("Error in store, grid of {} does not match the "
+                        "stored grid".format(var_type))
+
+    start = pd.Timestamp(index['start_day'])
+    if days.min() < start:
+        raise Exception("Error in store, {} is before the first stored day "
+                        "({}). Use a new store_dir to store earlier days."
+                        .format(days.min().date(), index['start_day']))
+    offsets = (days - start).days
+    n_days = max(index['days'], int(offsets.max()) + 1)
+    missing = set(index['missing'])
+
+    with open(bin_file, 'r+b') as f:
+        # Fill skipped days (including stale records past the index) with NaN
+        gap = np.full(lat_size * lon_size, np.nan, dtype=GRD_DTYPE)
+        for offset in range(index['days'], n_days):
+            if offset not in offsets:
+                f.seek(offset * n_bytes)
+                f.write(gap.tobytes())
+                missing.add(str((start + pd.Timedelta(days=offset)).date()))
+        for day, offset, fname in zip(days, offsets, fnames):
+            if os.stat(fname).st_size != n_bytes:
+                raise Exception("Error in file reading,"
+                                "mismatch in size of data-length")
+            with open(fname, 'rb') as day_file:
+                record = day_file.read()
+            f.seek(offset * n_bytes)
+            f.write(record)
+            missing.discard(str(day.date()))
+        f.flush()
+        os.fsync(f.fileno())
+
+    index['days'] = n_days
+    index['missing'] = sorted(missing)
+    with open(index_file + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_file + '.tmp', index_file)
+
+
+def read_store(store_dir, var_type, days, out):
+    """
+    Copy a window of days from the store into a (days, lon, lat) array.
+
+    Parameters
+    ----------
+    store_dir : str
+        Directory of the store.
+
+    var_type : str
+        'rain', 'rain_gpm', 'tmin' or 'tmax'.
+
+    days : pandas DatetimeIndex
+        Consecutive days to read.
+
+    out : numpy 3D array
+        Destination of shape (len(days), lon_size, lat_size).
+    """
+    index = store_index(store_dir, var_type)
+    if index is None:
+        raise Exception("Error in store, no data stored for {} in {}"
+                        .format(var_type, store_dir))
+    stored = pd.date_range(index['start_day'], periods=index['days'],
+                           freq='D').difference(
+                               pd.DatetimeIndex(index['missing']))
+    absent = days.difference(stored)
+    if len(absent) > 0:
+        raise Exception("Error in store, data not stored for {} day(s): {}"
+                        .format(len(absent),
+                                ', '.join(str(d.date()) for d in absent)))
+    lat_size, lon_size = index['lat']['size'], index['lon']['size']
+    bin_file, _ = _store_paths(store_dir, var_type)
+    records = np.memmap(bin_file, dtype=GRD_DTYPE, mode='r',
+                        shape=(index['days'], lat_size, lon_size))
+    lo = (days[0] - pd.Timestamp(index['start_day'])).days
+    out[...] = np.transpose(records[lo:lo + len(days)], (0, 2, 1))
+    return out
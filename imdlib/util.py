@@ -1,3 +1,5 @@
+import os
+import tempfile
 import numpy as np
 import pandas as pd
 from datetime import date
@@ -56,6 +58,36 @@ def parse_date_input(start, end=None):
     return start_day, end_day, start_yr, end_yr
 
 
+def float_dtype(data):
+    """
+    Floating point dtype for results derived from data.
+
+    float32 input stays float32, everything else becomes float64.
+    """
+    return np.result_type(data.dtype, np.float32)
+
+
+def atomic_write(path, write):
+    """
+    Write a file through a unique temporary file in its directory.
+
+    write is called with the temporary file opened in binary mode; the
+    file is renamed to path once it is complete, so readers never see a
+    half-written file and concurrent writers never share a temporary
+    file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                               prefix=os.path.basename(path) + '.',
+                               suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
 def LeapYear(year):
     """
     Check leap year or not
@@ -81,6 +113,60 @@ def get_lat_lon(lat, lon, lat_rage, lon_range):
     return lat_index, lon_index
 
 
+def get_lat_lon_index(lats, lons, lat_range, lon_range):
+    """
+    Vectorised get_lat_lon: INDEX of closest lat lon for many co-ordinates
+
+    Raises an Exception if any co-ordinate is outside the grid.
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    if lats.shape != lons.shape:
+        raise Exception("Error in lat lon setting."
+                        "lat and lon must have the same length!! ")
+    if (lats > lat_range.max()).any() or (lats < lat_range.min()).any():
+        raise Exception("Error in given lat coordinates."
+                        "Given lat value is not in the IMD data range!! ")
+    if (lons > lon_range.max()).any() or (lons < lon_range.min()).any():
+        raise Exception("Error in in given lon coordinates."
+                        "Given lon value is not in the IMD data range!! ")
+    # grids are ascending, so the nearest index is found by binary search
+    lat_index = _nearest_index(lats, lat_range)
+    lon_index = _nearest_index(lons, lon_range)
+    return lat_index, lon_index
+
+
+def _nearest_index(values, grid):
+    """Index of the nearest grid value for each value (grid ascending)."""
+    right = np.clip(np.searchsorted(grid, values), 1, len(grid) - 1)
+    left = right - 1
+    # ties go to the lower index, as with argmin in get_lat_lon
+    return np.where(values - grid[left] <= grid[right] - values, left, right)
+
+
+def get_bbox_slices(bbox, lat_range, lon_range):
+    """
+    Index slices of the grid cells inside a bounding box
+
+    bbox is (lon_min, lat_min, lon_max, lat_max). Returns
+    (lat_slice, lon_slice) with explicit start and stop.
+    """
+    lon_min, lat_min, lon_max, lat_max = bbox
+    if lon_min > lon_max or lat_min > lat_max:
+        raise ValueError("bbox must be (lon_min, lat_min, lon_max, lat_max)")
+    # tolerance for grid coordinates built with np.linspace
+    eps = 1e-6
+    lat_index = np.nonzero((lat_range >= lat_min - eps) &
+                           (lat_range <= lat_max + eps))[0]
+    lon_index = np.nonzero((lon_range >= lon_min - eps) &
+                           (lon_range <= lon_max + eps))[0]
+    if len(lat_index) == 0 or len(lon_index) == 0:
+        raise ValueError("bbox {} does not contain any IMD grid "
+                         "point".format(tuple(bbox)))
+    return (slice(int(lat_index[0]), int(lat_index[-1]) + 1),
+            slice(int(lon_index[0]), int(lon_index[-1]) + 1))
+
+
 def total_days(starting_day, ending_day):
     """
     Calculate to no of days for a given starting and ending day
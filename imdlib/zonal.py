@@ -0,0 +1,276 @@
+"""
+Area-weighted zonal averages of IMD grids over polygon features.
+
+For a shapefile with many features (districts, basins, ...) a sparse
+(n_features, n_cells) weight matrix is built once: the weight of a cell
+for a feature is the fraction of the cell covered by the feature times
+cos(latitude) of the cell. Cells are numbered in the (lon, lat) order of
+IMD.data, i.e. cell = lon_index * lat_size + lat_index.
+
+The average of every feature over every time step is then one sparse
+matrix product, with the weights of cells holding no value dropped from
+the normalisation. Weight matrices can be saved to a cache directory::
+
+    <cache_dir>/<key>.npz
+
+where the key is a hash of the shapefile geometry and the grid, so they
+are rebuilt only when either changes.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from imdlib.export import cell_block, land_cells
+
+try:
+    from shapefile import Reader
+    has_shapefile = True
+except ImportError:
+    has_shapefile = False
+try:
+    import shapely
+    from shapely.geometry import shape
+    has_shapely = True
+    # box, STRtree.query on arrays and vectorised area need shapely >= 2
+    has_shapely2 = int(shapely.__version__.split('.')[0]) >= 2
+except ImportError:
+    has_shapely = False
+    has_shapely2 = False
+
+# Bump when the construction of the weights changes
+WEIGHTS_VERSION = 1
+
+
+def read_ids(shpfile, id_field=None):
+    """
+    Ids of the features of a shapefile, read from its attribute table
+    without parsing any geometry.
+
+    Parameters
+    ----------
+    shpfile : str
+        Path of the shapefile.
+
+    id_field : str or None
+        Attribute holding the feature ids. If None, features are numbered
+        from 0 in file order.
+
+    Returns
+    -------
+    list
+    """
+    if not has_shapefile:
+        raise Exception("shapefile library is missing")
+    with Reader(shpfile) as sf:
+        if id_field is None:
+            return list(range(len(sf)))
+        return [record[id_field] for record in sf.iterRecords()]
+
+
+def read_features(shpfile, id_field=None):
+    """
+    Ids and geometries of the features of a shapefile.
+
+    Parameters
+    ----------
+    shpfile : str
+        Path of the shapefile.
+
+    id_field : str or None
+        Attribute holding the feature ids (see read_ids).
+
+    Returns
+    -------
+    ids : list
+    geometries : numpy array of shapely geometries
+    """
+    if not (has_shapefile and has_shapely):
+        raise Exception("shapefile or shapely library is missing")
+    with Reader(shpfile) as sf:
+        geometries = np.array([shape(s.__geo_interface__)
+                               for s in sf.shapes()], dtype=object)
+    return read_ids(shpfile, id_field), geometries
+
+
+def cell_boxes(lat, lon):
+    """
+    Polygons of the grid cells in (lon, lat) order, with edges halfway
+    between the cell centres.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    lat_edges = _edges(lat)
+    lon_edges = _edges(lon)
+    lon_lo, lat_lo = np.meshgrid(lon_edges[:-1], lat_edges[:-1], indexing='ij')
+    lon_hi, lat_hi = np.meshgrid(lon_edges[1:], lat_edges[1:], indexing='ij')
+    return shapely.box(lon_lo.ravel(), lat_lo.ravel(),
+                       lon_hi.ravel(), lat_hi.ravel())
+
+
+def _edges(centres):
+    """Cell edges of ascending cell centres."""
+    if len(centres) == 1:
+        return np.array([centres[0] - 0.5, centres[0] + 0.5])
+    mid = (centres[1:] + centres[:-1]) / 2
+    return np.concatenate(([2 * centres[0] - mid[0]], mid,
+                           [2 * centres[-1] - mid[-1]]))
+
+
+def overlap_weights(geometries, lat, lon, weighted=True):
+    """
+    Sparse (n_features, n_cells) matrix of cell overlap fractions.
+
+    Parameters
+    ----------
+    geometries : sequence of shapely geometries
+        Features, in lon/lat degrees.
+
+    lat, lon : numpy 1D array
+        Cell centres of the grid.
+
+    weighted : bool
+        If True, the fractions are multiplied by cos(latitude).
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+    """
+    if not has_shapely:
+        raise Exception("shapely library is missing")
+    if not has_shapely2:
+        raise Exception("Zonal weights need shapely >= 2, found shapely "
+                        "{}".format(shapely.__version__))
+    geometries = np.asarray(geometries, dtype=object)
+    boxes = cell_boxes(lat, lon)
+    # candidate (feature, cell) pairs from the bounding boxes, then the
+    # exact overlap of every pair
+    feature, cell = shapely.STRtree(boxes).query(geometries,
+                                                 predicate='intersects')
+    fraction = shapely.area(shapely.intersection(geometries[feature],
+                                                 boxes[cell])) / \
+        shapely.area(boxes[cell])
+    if weighted:
+        lat_index = cell % len(lat)
+        fraction = fraction * np.cos(np.deg2rad(np.asarray(lat)[lat_index]))
+    keep = fraction > 0
+    return sparse.csr_matrix((fraction[keep], (feature[keep], cell[keep])),
+                             shape=(len(geometries), len(lat) * len(lon)))
+
+
+def weights_key(shpfile, lat, lon, weighted=True):
+    """Hash of the shapefile geometry, the grid and the weighting."""
+    digest = hashlib.sha256()
+    with open(shpfile, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    for axis in (lat, lon):
+        digest.update(np.ascontiguousarray(axis, dtype=np.float64).tobytes())
+    digest.update('{}:{}'.format(WEIGHTS_VERSION, weighted).encode())
+    return digest.hexdigest()
+
+
+def zonal_weights(shpfile, lat, lon, id_field=None, weighted=True,
+                  cache_dir=None):
+    """
+    Feature ids and weight matrix of a shapefile on a grid.
+
+    Parameters
+    ----------
+    shpfile : str
+        Path of the shapefile.
+
+    lat, lon : numpy 1D array
+        Cell centres of the grid.
+
+    id_field : str or None
+        Attribute holding the feature ids (see read_features).
+
+    weighted : bool
+        If True, the overlap fractions are multiplied by cos(latitude).
+
+    cache_dir : str or None
+        If given, the weight matrix is loaded from / saved to this
+        directory, keyed by weights_key.
+
+    Returns
+    -------
+    ids : list
+    weights : scipy.sparse.csr_matrix of shape (n_features, n_cells)
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(
+            cache_dir, weights_key(shpfile, lat, lon, weighted) + '.npz')
+        if os.path.isfile(cache_file):
+            # geometries are only parsed when the weights are rebuilt
+            ids = read_ids(shpfile, id_field)
+            weights = sparse.load_npz(cache_file).tocsr()
+            if weights.shape == (len(ids), len(lat) * len(lon)):
+                return ids, weights
+    ids, geometries = read_features(shpfile, id_field)
+    weights = overlap_weights(geometries, lat, lon, weighted)
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # np.savez adds '.npz' to names without it
+        tmp_file = cache_file[:-len('.npz')] + '.tmp.npz'
+        sparse.save_npz(tmp_file, weights)
+        os.replace(tmp_file, cache_file)
+    return ids, weights
+
+
+def zonal_mean(obj, weights, ids=None, chunk_days=366):
+    """
+    Weighted average of every feature over every time step.
+
+    Parameters
+    ----------
+    obj : IMD object
+        Data to average. Sentinels, NaN and cells outside land_mask are
+        left out of both the sum and the normalisation.
+
+    weights : scipy.sparse matrix
+        (n_features, n_cells) weights, e.g. from zonal_weights.
+
+    ids : list or None
+        Column labels of the features.
+
+    chunk_days : int
+        Number of time steps averaged at a time.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by time, one column per feature. Features without any
+        valid cell on a time step are NaN.
+    """
+    n_lon, n_lat = obj.data.shape[1:]
+    weights = sparse.csr_matrix(weights)
+    if weights.shape[1] != n_lon * n_lat:
+        raise Exception("Error in weights, {} cells do not match the grid "
+                        "({} x {})".format(weights.shape[1], n_lon, n_lat))
+    # only the land cells some feature covers are read
+    lat_idx, lon_idx = land_cells(obj)
+    cells = lon_idx * n_lat + lat_idx
+    used = np.diff(weights.tocsc().indptr)[cells] > 0
+    lat_idx, lon_idx = lat_idx[used], lon_idx[used]
+    weights = weights[:, cells[used]]
+
+    time_index = obj._time_index()
+    n_time = len(time_index)
+    result = np.full((n_time, weights.shape[0]), np.nan)
+    for t0 in range(0, n_time, chunk_days):
+        t1 = min(t0 + chunk_days, n_time)
+        values = cell_block(obj, t0, t1, lat_idx, lon_idx)
+        valid = ~np.isnan(values)
+        total = weights @ np.where(valid, values, 0.0).T.astype(np.float64)
+        weight_sum = weights @ valid.T.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[t0:t1] = np.where(weight_sum > 0, total / weight_sum,
+                                     np.nan).T
+    if ids is None:
+        ids = list(range(weights.shape[0]))
+    return pd.DataFrame(result, index=time_index, columns=ids)
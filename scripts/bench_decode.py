@@ -0,0 +1,79 @@
+"""
+bench_decode.py
+===============
+Compares the per-year decode time of the legacy GRD reader
+(array.array + list(map(...)) + reshape/transpose) with the
+np.fromfile/readinto path used by imdlib.open_data.
+
+A synthetic year file is written for each grid so no IMD download is
+needed.
+
+Usage:
+    python bench_decode.py [repeats]
+"""
+
+import array
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from imdlib.grd import GRD_DTYPE, read_grd
+
+GRIDS = {
+    'rain (0.25)': (129, 135),
+    'temp (1.0)':  (31, 31),
+}
+DAYS = 365
+
+
+def legacy_decode(fname, days, lat_size, lon_size, out):
+    """Decode path used by imdlib <= 0.1.21."""
+    temp = array.array("f")
+    with open(fname, 'rb') as f:
+        temp.fromfile(f, os.stat(fname).st_size // temp.itemsize)
+    data = np.array(list(map(lambda x: x, temp)))
+    if len(data) != days * lat_size * lon_size:
+        raise Exception("Error in file reading,"
+                        "mismatch in size of data-length")
+    data = np.transpose(np.reshape(data, (days, lat_size, lon_size),
+                                   order='C'), (0, 2, 1))
+    out[:, :, :] = data
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main(repeats=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (lat_size, lon_size) in GRIDS.items():
+            fname = os.path.join(tmp, 'bench.grd')
+            values = np.random.default_rng(0).random(
+                (DAYS, lat_size, lon_size)).astype(GRD_DTYPE)
+            values.tofile(fname)
+
+            out_old = np.empty((DAYS, lon_size, lat_size))
+            out_new = np.empty((DAYS, lon_size, lat_size))
+            buf = np.empty(DAYS * lat_size * lon_size, dtype=GRD_DTYPE)
+
+            t_old = best_of(lambda: legacy_decode(
+                fname, DAYS, lat_size, lon_size, out_old), repeats)
+            t_new = best_of(lambda: read_grd(
+                fname, DAYS, lat_size, lon_size, out_new, buf), repeats)
+
+            assert np.array_equal(out_old, out_new)
+            print("{:<12s} legacy: {:8.4f} s   fromfile: {:8.4f} s   "
+                  "speed-up: {:6.1f}x".format(name, t_old, t_new,
+                                              t_old / t_new))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
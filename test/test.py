@@ -1,6 +1,8 @@
 import imdlib as imd
 import numpy as np
 import os
+import pytest
+import tempfile
 import unittest
 
 
@@ -18,6 +20,25 @@ def _has_temp_data(var_type, *years):
     return all(os.path.isfile(os.path.join(d, var_type, f'{y}.GRD')) for y in years)
 
 
+_GRID_SIZE = {'rain': (129, 135), 'tmin': (31, 31), 'tmax': (31, 31)}
+
+
+def _write_synthetic(file_dir, var_type, year, seed=0):
+    """Write a yearwise synthetic .grd file and return its (days, lat, lon) values."""
+    lat_size, lon_size = _GRID_SIZE[var_type]
+    days = 366 if imd.LeapYear(year) else 365
+    rng = np.random.default_rng(seed + year)
+    values = rng.gamma(0.5, 8.0, (days, lat_size, lon_size)).astype(np.float32)
+    if var_type == 'rain':
+        values[:, :10, :10] = -999.0
+    else:
+        values[:, :3, :3] = 99.9
+    os.makedirs(os.path.join(file_dir, var_type), exist_ok=True)
+    ext = '.grd' if var_type == 'rain' else '.GRD'
+    values.tofile(os.path.join(file_dir, var_type, f'{year}{ext}'))
+    return values
+
+
 def test_read():
     if not _has_data(2018):
         return
@@ -330,3 +351,972 @@ def test_spei_shape_and_stats():
     assert len(valid) > 0
     assert abs(valid.mean()) < 0.1
     assert abs(valid.std() - 1.0) < 0.1
+
+
+def test_lazy_matches_eager():
+    """lazy=True should expose the same values without reading into memory."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmax', 2019)
+        _write_synthetic(d, 'tmax', 2020)
+        eager = imd.open_data('tmax', '2019-03-01', '2020-02-10', 'yearwise', d)
+        lazy = imd.open_data('tmax', '2019-03-01', '2020-02-10', 'yearwise', d,
+                             lazy=True)
+        assert lazy.data.shape == eager.data.shape
+        assert np.array_equal(lazy.data[300:320, :, 5], eager.data[300:320, :, 5])
+        assert np.array_equal(lazy.data[[0, 330, 5]], eager.data[[0, 330, 5]])
+        assert np.array_equal(lazy.land_mask, eager.land_mask)
+        lazy.load()
+        assert np.array_equal(lazy.data, eager.data)
+
+        # rain over a full year drops all-zero cells in both modes
+        values = _write_synthetic(d, 'rain', 2019)
+        values[:, 60, 60] = 0.0
+        values.tofile(os.path.join(d, 'rain', '2019.grd'))
+        eager = imd.open_data('rain', 2019, 2019, 'yearwise', d)
+        lazy = imd.open_data('rain', 2019, 2019, 'yearwise', d, lazy=True)
+        assert not eager.land_mask[60, 60]
+        assert np.array_equal(lazy.land_mask, eager.land_mask)
+        assert np.allclose(lazy.spatial_mean().values,
+                           eager.spatial_mean().values)
+
+
+def test_read_size_mismatch():
+    """Truncated year files should still fail with the size-mismatch error."""
+    with tempfile.TemporaryDirectory() as d:
+        values = _write_synthetic(d, 'tmin', 2019)
+        values[:-1].tofile(os.path.join(d, 'tmin', '2019.GRD'))
+        try:
+            imd.open_data('tmin', 2019, 2019, 'yearwise', d)
+            assert False, 'Should have raised'
+        except Exception as e:
+            assert 'mismatch in size of data-length' in str(e)
+
+
+def test_read_values_transposed():
+    """Decoded data should be the file's (days, lat, lon) records as (days, lon, lat)."""
+    with tempfile.TemporaryDirectory() as d:
+        values = _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', 2019, 2019, 'yearwise', d)
+        assert np.array_equal(data.data, np.transpose(values, (0, 2, 1)))
+
+
+def test_float32_mode():
+    """dtype=np.float32 should keep file values exactly and flow through compute."""
+    with tempfile.TemporaryDirectory() as d:
+        values = _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', 2019, 2019, 'yearwise', d, dtype=np.float32)
+        assert data.data.dtype == np.float32
+        assert np.array_equal(data.data, np.transpose(values, (0, 2, 1)))
+        ref = imd.open_data('rain', 2019, 2019, 'yearwise', d)
+        for method in ('rxa', 'rtwd', 'dr'):
+            r32 = data.copy().compute(method, 'A')
+            r64 = ref.copy().compute(method, 'A')
+            assert r32.data.dtype == np.float32
+            assert np.allclose(r32.data, r64.data, rtol=1e-5, equal_nan=True)
+        clim = data.copy().climatology()
+        assert clim.data.dtype == np.float32
+
+
+def test_parallel_read_matches_serial():
+    """workers=N should give the same data and errors as a serial read."""
+    with tempfile.TemporaryDirectory() as d:
+        for year in range(2016, 2021):
+            _write_synthetic(d, 'tmin', year)
+        serial = imd.open_data('tmin', 2016, 2020, 'yearwise', d)
+        parallel = imd.open_data('tmin', 2016, 2020, 'yearwise', d, workers=4)
+        assert np.array_equal(serial.data, parallel.data)
+        assert np.array_equal(serial.land_mask, parallel.land_mask)
+        np.zeros(10, dtype=np.float32).tofile(os.path.join(d, 'tmin', '2018.GRD'))
+        try:
+            imd.open_data('tmin', 2016, 2020, 'yearwise', d, workers=4)
+            assert False, 'Should have raised'
+        except Exception as e:
+            assert 'mismatch in size of data-length' in str(e)
+
+
+def test_sub_year_partial_read():
+    """Sub-year ranges spanning years should match slicing the full years."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmax', 2019)
+        _write_synthetic(d, 'tmax', 2020)
+        full = imd.open_data('tmax', 2019, 2020, 'yearwise', d)
+        for start, end in [('2019-06-01', '2019-09-30'),
+                           ('2019-12-31', '2020-01-01'),
+                           ('2019-02-10', '2020-12-31')]:
+            sub = imd.open_data('tmax', start, end, 'yearwise', d, workers=2)
+            offset = imd.total_days('2019-01-01', start) - 1
+            assert sub.no_days == sub.data.shape[0]
+            assert np.array_equal(sub.data, full.data[offset:offset + sub.no_days])
+
+
+def test_bbox_push_down():
+    """bbox should read only the window and match clipping the full grid."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        full = imd.open_data('rain', '2019-06-01', '2019-06-30', 'yearwise', d)
+        bbox = (75.0, 15.0, 80.0, 20.0)
+        for lazy in (False, True):
+            sub = imd.open_data('rain', '2019-06-01', '2019-06-30', 'yearwise',
+                                d, bbox=bbox, lazy=lazy)
+            lon_sel = (full.lon_array >= 75.0) & (full.lon_array <= 80.0)
+            lat_sel = (full.lat_array >= 15.0) & (full.lat_array <= 20.0)
+            assert np.array_equal(sub.lon_array, full.lon_array[lon_sel])
+            assert np.array_equal(sub.lat_array, full.lat_array[lat_sel])
+            assert sub.data.shape == (30, lon_sel.sum(), lat_sel.sum())
+            assert np.array_equal(sub.data[:, :, :],
+                                  full.data[:, lon_sel][:, :, lat_sel])
+            assert sub.land_mask.shape == (lon_sel.sum(), lat_sel.sum())
+
+
+def test_bbox_temperature_sentinel():
+    """Temperature bbox away from the corner should still mask the sentinel."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmin', 2019)
+        full = imd.open_data('tmin', 2019, 2019, 'yearwise', d)
+        sub = imd.open_data('tmin', 2019, 2019, 'yearwise', d,
+                            bbox=(70.5, 7.5, 80.0, 20.0))
+        assert np.array_equal(sub.land_mask, full.land_mask[3:13, :13])
+        assert sub.land_mask.all()
+
+
+def test_bbox_temperature_keeps_file_sentinel():
+    """Masking bbox temperature data should use the file sentinel, not data[0,0,0]."""
+    with tempfile.TemporaryDirectory() as d:
+        values = _write_synthetic(d, 'tmin', 2019)
+        sub = imd.open_data('tmin', 2019, 2019, 'yearwise', d,
+                            bbox=(75, 15, 80, 20), dtype=np.float32)
+        # a real value equal to the window corner elsewhere in the window
+        sub.data[3, 2, 2] = sub.data[0, 0, 0]
+        assert sub.data[0, 0, 0] != np.float32(99.9)
+        xr_values = sub.get_xarray()['tmin'].values
+        assert not np.isnan(xr_values).any()
+        assert xr_values[3, 2, 2] == sub.data[0, 0, 0]
+        assert np.isclose(sub.spatial_mean()['tmin'].iloc[0],
+                          np.average(sub.data[0].astype(np.float64),
+                                     weights=np.broadcast_to(
+                                         np.cos(np.deg2rad(sub.lat_array)),
+                                         sub.data[0].shape)))
+        assert sub.copy()._sentinel() == np.float32(values[0, 0, 0])
+
+
+def test_bbox_temperature_remap():
+    """remap should mask the file sentinel of a bbox window, not its corner."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmin', 2019)
+        sub = imd.open_data('tmin', '2019-01-01', '2019-01-05', 'yearwise', d,
+                            bbox=(80, 20, 90, 30), dtype=np.float32)
+        corner = sub.data[0, 0, 0]
+        sub.data[0, 4, 4] = np.float32(99.9)
+        sub.data[0, 6, 6] = corner
+        sub.remap(0.5)
+        assert sub.data.shape == (5, 19, 19)
+        assert np.nanmax(sub.data) < 99.9
+        # only the cells nearest to the 99.9 cell are missing
+        lon, lat = np.nonzero(np.isnan(sub.data[0]))
+        assert len(lon) > 0 and (abs(lon - 8) <= 1).all() and \
+            (abs(lat - 8) <= 1).all()
+        assert (sub.data[0] == corner).sum() > 1
+        assert not np.isnan(sub.get_xarray()['tmin'].values[1:]).any()
+
+
+def test_extract_points_matches_full_cube():
+    """extract_points should match slicing the full cube with get_lat_lon."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        _write_synthetic(d, 'rain', 2020)
+        full = imd.open_data('rain', '2019-11-01', '2020-02-29', 'yearwise', d)
+        rng = np.random.default_rng(1)
+        points = np.column_stack([rng.uniform(6.5, 38.5, 50),
+                                  rng.uniform(66.5, 100.0, 50)])
+        points[0] = (6.5, 66.5)
+        points[1] = (38.5, 100.0)
+        ts = imd.extract_points('rain', points, '2019-11-01', '2020-02-29',
+                                'yearwise', d)
+        assert ts.shape == (full.no_days, 50)
+        assert ts.index[0] == full.get_xarray().time.values[0]
+        for k, (lat, lon) in enumerate(points):
+            i, j = imd.get_lat_lon(lat, lon, full.lat_array, full.lon_array)
+            assert np.array_equal(ts.iloc[:, k].values, full.data[:, j, i])
+
+
+def test_cache_round_trip_and_invalidation():
+    """Cached loads should match raw loads and follow changes of the source."""
+    with tempfile.TemporaryDirectory() as d:
+        cache = os.path.join(d, 'cache')
+        _write_synthetic(d, 'tmax', 2019)
+        _write_synthetic(d, 'tmax', 2020)
+        raw = imd.open_data('tmax', '2019-05-01', 2020, 'yearwise', d)
+        first = imd.open_data('tmax', '2019-05-01', 2020, 'yearwise', d,
+                              cache_dir=cache)
+        assert os.path.isfile(os.path.join(cache, 'tmax', '2019.npy'))
+        assert os.path.isfile(os.path.join(cache, 'tmax', '2020.json'))
+        second = imd.open_data('tmax', '2019-05-01', 2020, 'yearwise', d,
+                               cache_dir=cache, lazy=True)
+        assert np.array_equal(first.data, raw.data)
+        assert np.array_equal(second.data[:], raw.data)
+        # Rewriting the source must invalidate the cached year
+        new_values = _write_synthetic(d, 'tmax', 2020, seed=7)
+        os.utime(os.path.join(d, 'tmax', '2020.GRD'), ns=(0, 0))
+        third = imd.open_data('tmax', 2020, 2020, 'yearwise', d, cache_dir=cache)
+        assert np.array_equal(third.data, np.transpose(new_values, (0, 2, 1)))
+
+
+def test_cache_shared_by_two_archives():
+    """Archives sharing a cache_dir should never be served each other's data."""
+    with tempfile.TemporaryDirectory() as d:
+        cache = os.path.join(d, 'cache')
+        a, b = os.path.join(d, 'a'), os.path.join(d, 'b')
+        values_a = _write_synthetic(a, 'tmin', 2019, seed=1)
+        values_b = _write_synthetic(b, 'tmin', 2019, seed=2)
+        for file_dir, values in ((a, values_a), (b, values_b), (a, values_a)):
+            data = imd.open_data('tmin', 2019, 2019, 'yearwise', file_dir,
+                                 cache_dir=cache)
+            assert np.array_equal(data.data, np.transpose(values, (0, 2, 1)))
+        assert sorted(os.listdir(os.path.join(cache, 'tmin'))) == \
+            ['2019.json', '2019.npy']
+        # the sentinel of a bbox read comes from the sidecar
+        sub = imd.open_data('tmin', 2019, 2019, 'yearwise', a,
+                            bbox=(75, 15, 80, 20), cache_dir=cache)
+        assert sub._sentinel() == np.float32(99.9)
+
+
+def test_iter_data_blocks():
+    """iter_data blocks should cover the period and match open_data."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        _write_synthetic(d, 'rain', 2020)
+        full = imd.open_data('rain', '2019-11-15', '2020-03-10', 'yearwise', d)
+        months = list(imd.iter_data('rain', '2019-11-15', '2020-03-10',
+                                    block='month', fn_format='yearwise',
+                                    file_dir=d))
+        assert [m.start_day for m in months][:2] == ['2019-11-15', '2019-12-01']
+        assert months[-1].end_day == '2020-03-10'
+        assert sum(m.no_days for m in months) == full.no_days
+        offset = 0
+        for block in imd.iter_data('rain', '2019-11-15', '2020-03-10', block=40,
+                                   fn_format='yearwise', file_dir=d):
+            assert np.array_equal(block.data,
+                                  full.data[offset:offset + block.no_days])
+            assert block.land_mask.shape == full.land_mask.shape
+            offset += block.no_days
+        assert offset == full.no_days
+        years = imd.iter_data('rain', 2019, 2020, fn_format='yearwise', file_dir=d)
+        first = next(years)
+        second = next(years)
+        assert (first.no_days, second.no_days) == (365, 366)
+        # the buffer is shared between blocks
+        assert np.shares_memory(first.data, second.data)
+
+
+def _serve(handler_cls):
+    """Start a local HTTP server in a thread and return (server, url)."""
+    import threading
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_cls)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}/'.format(server.server_address[1])
+
+
+def test_download_files_pooled_with_retries():
+    """Concurrent downloads should retry transient errors and write atomically."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs
+    from imdlib.download import download_files
+    failures = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers['Content-Length'])
+            year = parse_qs(self.rfile.read(length).decode())['rain'][0]
+            # fail the first request of every year with a server error
+            if year not in failures:
+                failures[year] = True
+                status, body = 503, b''
+            elif year == '1999':
+                status, body = 404, b''
+            else:
+                status, body = 200, np.full(10, int(year), np.float32).tobytes()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server, url = _serve(Handler)
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            jobs = [({'rain': y}, os.path.join(d, f'{y}.grd'), str(y), 40)
+                    for y in range(2000, 2006)]
+            download_files(url, jobs, max_workers=3, backoff=0)
+            for y in range(2000, 2006):
+                values = np.fromfile(os.path.join(d, f'{y}.grd'), np.float32)
+                assert np.all(values == y)
+            assert not any(f.endswith('.part') for f in os.listdir(d))
+            # client errors are not retried and nothing is written
+            bad = os.path.join(d, '1999.grd')
+            try:
+                download_files(url, [({'rain': 1999}, bad, '1999', 40)],
+                               max_workers=2, backoff=0)
+            except Exception as e:
+                assert '404' in str(e)
+            else:
+                raise AssertionError('expected an HTTP error')
+            assert not os.path.exists(bad)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_download_resume_and_verify():
+    """Broken transfers should resume with a Range request and be verified."""
+    from http.server import BaseHTTPRequestHandler
+    from imdlib.download import download_files, load_manifest, verify_files
+    body = np.arange(200000, dtype=np.float32).tobytes()
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            requested = self.headers.get('Range')
+            ranges.append(requested)
+            if requested is None:
+                # announce the whole file but break off half way
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:300000])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            start = int(requested.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Length', str(len(body) - start))
+            self.end_headers()
+            self.wfile.write(body[start:])
+
+        def log_message(self, *args):
+            pass
+
+    server, url = _serve(Handler)
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, '2001.grd')
+            download_files(url, [({'rain': 2001}, fname, '2001', len(body))],
+                           backoff=0)
+            # only the missing tail is requested again
+            assert ranges[0] is None and len(ranges) == 2
+            assert 0 < int(ranges[1][6:-1]) <= 300000
+            with open(fname, 'rb') as f:
+                assert f.read() == body
+            assert load_manifest(d)['2001.grd']['size'] == len(body)
+            other = os.path.join(d, '2002.grd')
+            with open(other, 'wb') as f:
+                f.write(body)
+            status = verify_files([(fname, len(body)), (other, len(body)),
+                                   (os.path.join(d, '2003.grd'), len(body))])
+            assert status == {fname: 'ok', other: 'ok',
+                              os.path.join(d, '2003.grd'): 'missing'}
+            # the sweep records hashes of unlisted complete files
+            assert '2002.grd' in load_manifest(d)
+            with open(other, 'r+b') as f:
+                f.write(b'\x00\x01')
+            with open(fname, 'ab') as f:
+                f.write(b'\x00')
+            status = verify_files([(fname, len(body)), (other, len(body))],
+                                  max_workers=2)
+            assert status == {fname: 'size', other: 'hash'}
+            # unchanged files are trusted on size and mtime, not re-hashed
+            import imdlib.download as download
+            with open(fname, 'wb') as f:
+                f.write(body)
+            assert verify_files([(fname, len(body))]) == {fname: 'ok'}
+            hashed = []
+            real_sha256 = download.file_sha256
+            download.file_sha256 = lambda name: hashed.append(name) or \
+                real_sha256(name)
+            try:
+                assert verify_files([(fname, len(body))]) == {fname: 'ok'}
+                assert hashed == []
+                assert verify_files([(fname, len(body))], rehash=True) == \
+                    {fname: 'ok'}
+                assert hashed == [fname]
+            finally:
+                download.file_sha256 = real_sha256
+            assert not [n for n in os.listdir(d) if n.endswith('.tmp')]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_real_time_store_append_and_window():
+    """Appended real-time days should read back like the daily files."""
+    import pandas as pd
+    from imdlib.real import _real_grid
+    from imdlib.store import append_days, stored_days
+    lat, lon = _real_grid('tmin')
+    rng = np.random.default_rng(3)
+    with tempfile.TemporaryDirectory() as d:
+        files = os.path.join(d, 'files')
+        store = os.path.join(d, 'store')
+        os.makedirs(files)
+        days = pd.date_range('2021-01-01', '2021-01-10', freq='D')
+        for day in days:
+            rng.random((61, 61)).astype(np.float32).tofile(
+                imd.get_filename_realtime(day, 'tmin', files))
+        fnames = [imd.get_filename_realtime(day, 'tmin', files) for day in days]
+        # first run stores a few days, later runs append and leave a gap
+        append_days(store, 'tmin', days[:3], fnames[:3], lat, lon)
+        append_days(store, 'tmin', days[5:], fnames[5:], lat, lon)
+        assert list(stored_days(store, 'tmin')) == list(days[:3]) + list(days[5:])
+        window = imd.open_real_data('tmin', '2021-01-06', '2021-01-09',
+                                    store_dir=store)
+        direct = imd.open_real_data('tmin', '2021-01-06', '2021-01-09', files)
+        assert np.array_equal(window.data, direct.data)
+        try:
+            imd.open_real_data('tmin', '2021-01-02', '2021-01-07', store_dir=store)
+        except Exception as e:
+            assert '2021-01-04' in str(e) and '2021-01-05' in str(e)
+        else:
+            raise AssertionError('expected missing days to be reported')
+        # filling the gap makes the whole range readable
+        append_days(store, 'tmin', days[3:5], fnames[3:5], lat, lon)
+        full = imd.open_real_data('tmin', '2021-01-01', '2021-01-10',
+                                  store_dir=store, dtype=np.float32)
+        direct = imd.open_real_data('tmin', '2021-01-01', '2021-01-10', files,
+                                    dtype=np.float32)
+        assert np.array_equal(full.data, direct.data)
+
+
+def test_open_real_data_batched():
+    """Real-time days should be read concurrently with a land mask."""
+    import pandas as pd
+    rng = np.random.default_rng(5)
+    with tempfile.TemporaryDirectory() as d:
+        days = pd.date_range('2022-06-01', '2022-06-20', freq='D')
+        for day in days:
+            values = rng.random((129, 135)).astype(np.float32)
+            values[:5, :5] = -999.0
+            values.tofile(imd.get_filename_realtime(day, 'rain', d))
+        serial = imd.open_real_data('rain', '2022-06-01', '2022-06-20', d,
+                                    workers=None)
+        threaded = imd.open_real_data('rain', '2022-06-01', '2022-06-20', d,
+                                      workers=4)
+        assert np.array_equal(serial.data, threaded.data)
+        assert threaded.land_mask.shape == (135, 129)
+        assert not threaded.land_mask[:5, :5].any()
+        assert threaded.land_mask[5:, 5:].all()
+        os.remove(imd.get_filename_realtime(days[3], 'rain', d))
+        os.remove(imd.get_filename_realtime(days[7], 'rain', d))
+        # a truncated file is reported along with the missing ones
+        with open(imd.get_filename_realtime(days[10], 'rain', d), 'r+b') as f:
+            f.truncate(1000)
+        for catalog in (None, imd.Catalog(d)):
+            try:
+                imd.open_real_data('rain', '2022-06-01', '2022-06-20', d,
+                                   catalog=catalog)
+            except Exception as e:
+                assert '3 day(s)' in str(e)
+                assert '2022-06-04' in str(e) and '2022-06-08' in str(e)
+                assert '2022-06-11' in str(e)
+            else:
+                raise AssertionError('expected missing days to be reported')
+
+
+def test_catalog_paths_coverage_and_gaps():
+    """A catalog should index files once and drive open_data/open_real_data."""
+    import pandas as pd
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2018)
+        _write_synthetic(d, 'rain', 2020)
+        with open(os.path.join(d, 'rain', '2021.grd'), 'wb') as f:
+            f.write(b'\0' * 1024)
+        # flat temperature file without variable subdirectory
+        np.zeros((365, 31, 31), np.float32).tofile(os.path.join(d, '2019.GRD'))
+        for day in pd.date_range('2022-07-01', '2022-07-03', freq='D'):
+            np.zeros((61, 61), np.float32).tofile(
+                imd.get_filename_realtime(day, 'tmax', d))
+        cat = imd.Catalog(d)
+        assert cat.years('rain') == [2018, 2020, 2021]
+        assert cat.years('tmin') == cat.years('tmax') == [2019]
+        assert cat.coverage('rain') == (2018, 2021)
+        assert cat.gaps('rain') == [2019, 2021]
+        assert cat.gaps('rain', 2018, 2020) == [2019]
+        assert cat.incomplete('rain') == [os.path.join(d, 'rain', '2021.grd')]
+        assert list(cat.gaps('tmax', '2022-06-30', '2022-07-03',
+                             realtime=True)) == [pd.Timestamp('2022-06-30')]
+        assert cat.path('tmin', 2019, 'yearwise') == os.path.join(d, '2019.GRD')
+
+        via_cat = imd.open_data('rain', 2020, 2020, 'yearwise', catalog=cat)
+        direct = imd.open_data('rain', 2020, 2020, 'yearwise', d)
+        assert np.array_equal(via_cat.data, direct.data)
+        try:
+            imd.open_data('rain', 2018, 2021, 'yearwise', catalog=cat)
+        except Exception as e:
+            assert '2 year(s): 2019, 2021' in str(e)
+        else:
+            raise AssertionError('expected missing years to be reported')
+        real = imd.open_real_data('tmax', '2022-07-01', '2022-07-03',
+                                  catalog=cat)
+        assert real.data.shape == (3, 61, 61)
+
+
+def test_catalog_prefers_complete_files():
+    """A complete file should win over an incomplete one of the preferred format."""
+    from imdlib.catalog import Catalog
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        with open(os.path.join(d, 'rain', 'Rainfall_ind2019_rfp25.grd'),
+                  'wb') as f:
+            f.write(b'\x00' * 1024)
+        cat = Catalog(d)
+        assert cat.gaps('rain', 2019, 2019) == []
+        assert cat.path('rain', 2019) == os.path.join(d, 'rain', '2019.grd')
+        data = imd.open_data('rain', 2019, 2019, catalog=cat)
+        assert data.data.shape == (365, 135, 129)
+
+
+def test_open_dataset_multi_variable():
+    """open_dataset should match separate open_data calls in one Dataset."""
+    with tempfile.TemporaryDirectory() as d:
+        for var_type in ('rain', 'tmin', 'tmax'):
+            _write_synthetic(d, var_type, 2019, seed=len(var_type))
+        ds = imd.open_dataset(['rain', 'tmin', 'tmax'], '2019-03-01',
+                              '2019-05-31', 'yearwise', d)
+        assert list(ds) == ['rain', 'tmin', 'tmax']
+        for var_type in ds:
+            single = imd.open_data(var_type, '2019-03-01', '2019-05-31',
+                                   'yearwise', d)
+            assert np.array_equal(ds[var_type].data, single.data)
+            assert np.array_equal(ds[var_type].land_mask, single.land_mask)
+        assert ds.no_days == 92
+        xr_ds = ds.get_xarray()
+        assert set(xr_ds.data_vars) == {'rain', 'tmin', 'tmax'}
+        assert xr_ds['rain'].dims == ('time', 'lat_025', 'lon_025')
+        assert xr_ds['tmin'].dims == ('time', 'lat_100', 'lon_100')
+        # variables on one grid share plain lat/lon dimensions
+        temps = imd.open_dataset(['tmin', 'tmax'], 2019, 2019, 'yearwise', d)
+        assert temps.get_xarray()['tmax'].dims == ('time', 'lat', 'lon')
+
+
+def test_get_xarray_lazy_and_cached():
+    """get_xarray should mask sentinels lazily, without copies, and be cached."""
+    import xarray as xr
+    with tempfile.TemporaryDirectory() as d:
+        values = _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', '2019-01-01', '2019-03-31', 'yearwise', d,
+                             dtype=np.float32)
+        ds = data.get_xarray()
+        # nothing is read or copied until the values are accessed
+        assert not isinstance(ds['rain'].variable._data, np.ndarray)
+        rain = ds['rain'].values
+        assert rain.dtype == np.float32
+        assert np.isnan(rain[:, :10, :10]).all()
+        assert np.array_equal(rain[:, 10:, 10:], values[:90, 10:, 10:])
+        assert np.isnan(ds['rain'].isel(time=5, lat=3, lon=4).item())
+        assert ds['rain'].isel(time=5, lat=20, lon=30).item() == values[5, 20, 30]
+        # raw data keeps its sentinels
+        assert data.data[0, 0, 0] == -999.0
+        # the Dataset is cached; loading a copy keeps nothing on the object
+        again = data.get_xarray()
+        assert again['rain'].variable._data is ds['rain'].variable._data
+        again.load()
+        assert not isinstance(data.get_xarray()['rain'].variable._data,
+                              np.ndarray)
+        # in-place edits are read on access, new data rebuilds the Dataset
+        data.data[0, 20, 20] = 12.5
+        assert data.get_xarray()['rain'].values[0, 20, 20] == 12.5
+        data.data = data.data[:, :, :] * 2
+        assert data.get_xarray()['rain'].values[0, 20, 20] == 25.0
+        assert data.get_xarray()['rain'].variable._data is not \
+            ds['rain'].variable._data
+        # the default NetCDF export matches get_xarray
+        data.to_netcdf('plain', d)
+        with xr.open_dataset(os.path.join(d, 'plain.nc')) as nc:
+            np.testing.assert_array_equal(nc['rain'].values,
+                                          data.get_xarray()['rain'].values)
+            # same layout as before the streamed writer
+            assert not nc.encoding.get('unlimited_dims')
+            assert nc['rain'].encoding.get('chunksizes') is None
+        # computed data is wrapped without copying
+        annual = imd.open_data('rain', 2019, 2019, 'yearwise', d)
+        annual.compute('rxa', 'A')
+        assert np.shares_memory(annual.get_xarray()['rxa'].values, annual.data)
+
+
+def test_to_netcdf_stream_compressed_append():
+    """Streamed NetCDF export should match get_xarray and support appends."""
+    netCDF4 = pytest.importorskip('netCDF4')
+    import xarray as xr
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmax', 2019)
+        _write_synthetic(d, 'tmax', 2020)
+        both = imd.open_data('tmax', '2019-06-01', 2020, 'yearwise', d,
+                             dtype=np.float32)
+        both.to_netcdf('full', d, compression='zlib', stream=True)
+        out = os.path.join(d, 'full.nc')
+        with netCDF4.Dataset(out) as nc:
+            var = nc.variables['tmax']
+            assert nc.dimensions['time'].isunlimited()
+            assert var.filters()['zlib'] and var.chunking() == [365, 16, 16]
+            assert var.dtype == np.float32
+        with xr.open_dataset(out) as ds:
+            ref = both.get_xarray()
+            assert np.array_equal(ds['tmax'].values, ref['tmax'].values,
+                                  equal_nan=True)
+            assert np.array_equal(ds['time'].values, ref['time'].values)
+        # the same file built in two appends
+        first = imd.open_data('tmax', '2019-06-01', 2019, 'yearwise', d)
+        second = imd.open_data('tmax', 2020, 2020, 'yearwise', d)
+        first.to_netcdf('parts', d, stream=True)
+        second.to_netcdf('parts', d, append=True)
+        with xr.open_dataset(os.path.join(d, 'parts.nc')) as ds:
+            assert np.array_equal(ds['tmax'].values, ref['tmax'].values,
+                                  equal_nan=True)
+            assert np.array_equal(ds['time'].values, ref['time'].values)
+        try:
+            second.to_netcdf('parts', d, append=True)
+        except Exception as e:
+            assert 'already holds data' in str(e)
+        else:
+            raise AssertionError('expected overlapping append to fail')
+
+
+def test_table_export_land_cells():
+    """CSV and Parquet exports should hold only land cells, matching get_xarray."""
+    import pandas as pd
+    pq = pytest.importorskip('pyarrow.parquet')
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'tmin', 2019)
+        _write_synthetic(d, 'tmin', 2020)
+        data = imd.open_data('tmin', '2019-12-01', 2020, 'yearwise', d,
+                             dtype=np.float32)
+        ref = data.get_xarray().to_dataframe().reset_index()
+        ref = ref.dropna(subset=['tmin']).reset_index(drop=True)
+        n_days, n_cells = data.data.shape[0], int(data.land_mask.sum())
+
+        data.to_parquet('long', d)
+        pf = pq.ParquetFile(os.path.join(d, 'long.parquet'))
+        assert pf.metadata.num_row_groups == 2
+        long = pf.read().to_pandas()
+        assert list(long.columns) == ['time', 'lat', 'lon', 'tmin']
+        assert len(long) == n_days * n_cells
+        assert np.array_equal(long[['lat', 'lon']].values,
+                              ref[['lat', 'lon']].values)
+        assert np.array_equal(long['tmin'].values, ref['tmin'].values)
+
+        data.to_csv('long', out_dir=d)
+        csv = pd.read_csv(os.path.join(d, 'long.csv'), parse_dates=['time'])
+        assert len(csv) == len(long)
+        assert np.array_equal(csv['time'].values, long['time'].values)
+        assert np.allclose(csv['tmin'].values, long['tmin'].values, atol=1e-4)
+
+        data.to_parquet('wide', d, layout='wide')
+        wide = pq.read_table(os.path.join(d, 'wide.parquet')).to_pandas()
+        assert wide.shape == (n_days, n_cells + 1)
+        first = wide.columns[1]
+        lat, lon = map(float, first.split())
+        point = ref[(ref.lat == lat) & (ref.lon == lon)]
+        assert np.array_equal(wide[first].values, point['tmin'].values)
+
+
+def test_to_csv_points_matches_to_csv():
+    """to_csv_points should write what to_csv writes point by point."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', '2019-03-01', '2019-04-30', 'yearwise', d)
+        points = [(20.03, 77.23), (12.5, 78.0), (30.0, 75.5)]
+        data.to_csv_points(points, 'pts', d, layout='per_file')
+        data.to_csv_points(points, 'wide', d)
+        wide = open(os.path.join(d, 'wide.csv')).read().splitlines()
+        assert wide[0] == 'DateTime,' + ','.join(
+            '{} {}'.format(lat, lon) for lat, lon in points)
+        assert len(wide) == data.no_days + 1
+        for k, (lat, lon) in enumerate(points):
+            data.to_csv('one', lat, lon, d)
+            name = '_{:.2f}_{:.2f}.csv'.format(lat, lon)
+            with open(os.path.join(d, 'pts' + name)) as f:
+                batch = f.read()
+            with open(os.path.join(d, 'one' + name)) as f:
+                single = f.read()
+            assert batch == single
+            assert [row.split(',')[k + 1] for row in wide[1:]] == \
+                [row.split(',')[1] for row in single.splitlines()[1:]]
+
+
+def test_to_geotiff_cog_split():
+    """GeoTIFF export should write north-up tiled COGs, whole or split."""
+    rasterio = pytest.importorskip('rasterio')
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        _write_synthetic(d, 'rain', 2020)
+        data = imd.open_data('rain', '2019-12-30', '2020-01-02', 'yearwise', d,
+                             dtype=np.float32)
+        ref = data.get_xarray()['rain'].values[:, ::-1, :]
+        names = data.to_geotiff('rain', d)
+        assert names == [os.path.join(d, 'rain') + '.tif']
+        with rasterio.open(names[0]) as src:
+            assert src.count == 4 and src.shape == (129, 135)
+            assert src.profile['tiled'] and src.compression.value == 'DEFLATE'
+            assert src.overviews(1)
+            assert src.descriptions[0] == '2019-12-30'
+            # upper left corner of the north-west cell
+            assert (src.transform.c, src.transform.f) == (
+                float(data.lon_array[0]) - 0.125,
+                float(data.lat_array[-1]) + 0.125)
+            assert np.array_equal(src.read(), ref, equal_nan=True)
+            assert np.isnan(src.nodata)
+
+        years = data.to_geotiff('rain', d, split='year', workers=2)
+        assert [os.path.basename(n) for n in years] == ['rain_2019.tif',
+                                                        'rain_2020.tif']
+        days = data.to_geotiff('rain', d, split='day', workers=2)
+        assert os.path.basename(days[-1]) == 'rain_2020-01-02.tif'
+        with rasterio.open(days[2]) as src:
+            assert np.array_equal(src.read(1), ref[2], equal_nan=True)
+        assert not [n for n in os.listdir(d) if n.endswith('.tmp.tif')]
+
+
+def test_to_grd_round_trip():
+    """Data written with to_grd should read back bit-identically."""
+    import hashlib
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, 'src')
+        for year in (2019, 2020):
+            _write_synthetic(src, 'tmax', year)
+        data = imd.open_data('tmax', 2019, 2020, 'yearwise', src,
+                             dtype=np.float32)
+        out = os.path.join(d, 'out')
+        names = data.to_grd(out_dir=out, split='year')
+        assert [os.path.basename(n) for n in names] == ['2019.GRD', '2020.GRD']
+        for name in names:
+            orig = os.path.join(src, 'tmax', os.path.basename(name))
+            assert hashlib.sha256(open(name, 'rb').read()).digest() == \
+                hashlib.sha256(open(orig, 'rb').read()).digest()
+
+        # NaN cells of derived data become the sentinel; partial years
+        # are padded to full year files
+        part = imd.open_data('tmax', '2020-03-01', '2020-03-31', 'yearwise',
+                             src)
+        part.data = part.data.copy()
+        part.data[:, 10, 10] = np.nan
+        part.to_grd(out_dir=os.path.join(d, 'part'), split='year')
+        back = imd.open_data('tmax', '2020-03-01', '2020-03-31', 'yearwise',
+                             os.path.join(d, 'part'))
+        assert back.data[0, 10, 10] == np.float32(99.9)
+        assert np.array_equal(back.get_xarray()['tmax'].values,
+                              part.get_xarray()['tmax'].values, equal_nan=True)
+        single = part.to_grd('march', d)
+        assert os.path.getsize(single[0]) == 31 * 31 * 31 * 4
+
+        # one file per day, read by open_real_data
+        _write_synthetic(src, 'rain', 2020)
+        rain = imd.open_data('rain', '2020-01-01', '2020-01-03', 'yearwise',
+                             src, dtype=np.float32)
+        days = rain.to_grd(out_dir=os.path.join(d, 'rt'), split='day')
+        assert os.path.basename(days[0]) == 'rain_ind0.25_20_01_01.grd'
+        real = imd.open_real_data('rain', '2020-01-01', '2020-01-03',
+                                  os.path.join(d, 'rt'), dtype=np.float32)
+        assert np.array_equal(real.data, rain.data)
+        # day files need the real-time grid, not the 31 x 31 archive one
+        try:
+            data.to_grd(out_dir=os.path.join(d, 'rt'), split='day')
+        except Exception as e:
+            assert 'real-time grid' in str(e)
+        else:
+            raise AssertionError('expected the archive grid to be rejected')
+        assert sorted(os.listdir(os.path.join(d, 'rt'))) == \
+            sorted(os.path.basename(n) for n in days)
+
+        # a bbox window keeps its real values; only the file sentinel
+        # becomes 99.9
+        sub = imd.open_data('tmax', 2019, 2019, 'yearwise', src,
+                            bbox=(75, 15, 80, 20), dtype=np.float32)
+        sub.data[3, 2, 2] = sub.data[0, 0, 0]
+        name = sub.to_grd('window', d)[0]
+        written = np.fromfile(name, dtype=np.float32).reshape(
+            sub.data.shape[0], sub.data.shape[2], sub.data.shape[1])
+        written = np.swapaxes(written, 1, 2)
+        assert written[0, 0, 0] == sub.data[0, 0, 0] != np.float32(99.9)
+        assert written[3, 2, 2] == sub.data[0, 0, 0]
+        assert np.array_equal(written, sub.data)
+
+
+def _loop_mean(values, weights):
+    """Reference weighted mean of (time, cell) values, one step at a time."""
+    out = []
+    for row in values:
+        valid = ~np.isnan(row)
+        out.append(np.sum(row[valid] * weights[valid]) / np.sum(weights[valid])
+                   if valid.any() else np.nan)
+    return np.array(out)
+
+
+def test_spatial_mean_and_zonal_stats():
+    """Vectorised spatial_mean and zonal_stats should match per-step loops."""
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', '2019-01-01', '2019-01-20', 'yearwise', d,
+                             dtype=np.float32)
+        data.data = data.data.copy()
+        data.data[5, :, :] = -999.0          # a day without any value
+        data.data[6, 60:, :] = np.nan         # a partly missing day
+        cube = data.get_xarray()['rain'].values        # (time, lat, lon)
+        cube[:, ~data.land_mask.T] = np.nan
+        cos_lat = np.cos(np.deg2rad(data.lat_array))[:, None] * \
+            np.ones((1, len(data.lon_array)))
+        flat = cube.reshape(len(cube), -1)
+
+        ts = data.spatial_mean(chunk_days=7)
+        assert np.allclose(ts['rain'].values,
+                           _loop_mean(flat, cos_lat.ravel()), equal_nan=True)
+        plain = data.spatial_mean(weighted=False)
+        assert np.allclose(plain['rain'].values,
+                           _loop_mean(flat, np.ones(flat.shape[1])),
+                           equal_nan=True)
+
+        zones = np.load(os.path.join(os.path.dirname(imd.__file__), 'data',
+                                     'region_mask_025.npy'))
+        stats = data.zonal_stats(zones, chunk_days=7)
+        zone_flat = zones.T.ravel()
+        assert list(stats['mean'].columns) == [0, 1, 2]
+        for zone in (0, 1, 2):
+            cells = flat[:, zone_flat == zone]
+            assert np.allclose(stats['mean'][zone].values,
+                               _loop_mean(cells, cos_lat.ravel()[zone_flat == zone]),
+                               equal_nan=True)
+            assert np.allclose(stats['sum'][zone].values, np.nansum(cells, 1))
+            assert np.array_equal(stats['count'][zone].values,
+                                  (~np.isnan(cells)).sum(1))
+            assert np.allclose(stats['max'][zone].values,
+                               np.nanmax(cells, 1), equal_nan=True)
+            assert np.allclose(stats['min'][zone].values,
+                               np.nanmin(cells, 1), equal_nan=True)
+        assert stats['count'][0].iloc[5] == 0
+
+
+def _write_boxes(path, boxes):
+    """Write named rectangles (name, x0, y0, x1, y1) as a polygon shapefile."""
+    shapefile = pytest.importorskip('shapefile')
+    with shapefile.Writer(path, shapeType=shapefile.POLYGON) as w:
+        w.field('NAME', 'C')
+        for name, x0, y0, x1, y1 in boxes:
+            w.poly([[(x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0)]])
+            w.record(name)
+
+
+def test_zonal_mean_overlap_weights_and_cache():
+    """zonal_mean should weight cells by covered fraction and reuse cached weights."""
+    pytest.importorskip('shapefile')
+    pytest.importorskip('shapely')
+    from imdlib import zonal
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', '2019-06-01', '2019-06-10', 'yearwise', d,
+                             dtype=np.float32)
+        shp = os.path.join(d, 'zones')
+        # cells are 0.25 degree wide, centred on 78.0/78.25 E and 20.0/20.25 N
+        _write_boxes(shp, [('four', 77.875, 19.875, 78.375, 20.375),
+                           ('half', 78.0, 19.875, 78.125, 20.125),
+                           ('oneandhalf', 77.875, 19.875, 78.25, 20.125)])
+        cache = os.path.join(d, 'weights')
+        zm = data.zonal_mean(shp + '.shp', 'NAME', cache_dir=cache)
+        assert list(zm.columns) == ['four', 'half', 'oneandhalf']
+        assert len(os.listdir(cache)) == 1
+
+        lat = list(np.round(data.lat_array, 3))
+        lon = list(np.round(data.lon_array, 3))
+
+        def cell(x, y):
+            return data.data[:, lon.index(x), lat.index(y)].astype(np.float64)
+
+        w20, w2025 = np.cos(np.deg2rad([20.0, 20.25]))
+        four = (w20 * (cell(78.0, 20.0) + cell(78.25, 20.0)) +
+                w2025 * (cell(78.0, 20.25) + cell(78.25, 20.25))) / \
+            (2 * w20 + 2 * w2025)
+        assert np.allclose(zm['four'].values, four)
+        assert np.allclose(zm['half'].values, cell(78.0, 20.0))
+        assert np.allclose(zm['oneandhalf'].values,
+                           (cell(78.0, 20.0) + 0.5 * cell(78.25, 20.0)) / 1.5)
+
+        # cached weights give the same result; cells without value drop out
+        cache_file = os.path.join(cache, os.listdir(cache)[0])
+        mtime = os.stat(cache_file).st_mtime_ns
+        data.data = data.data.copy()
+        data.data[:, lon.index(78.25), lat.index(20.0)] = -999.0
+        # a cache hit reads the ids only, no geometry
+        read_features = zonal.read_features
+        zonal.read_features = None
+        try:
+            again = data.zonal_mean(shp + '.shp', 'NAME', cache_dir=cache)
+        finally:
+            zonal.read_features = read_features
+        assert os.stat(cache_file).st_mtime_ns == mtime
+        assert np.allclose(again['oneandhalf'].values, cell(78.0, 20.0))
+        assert np.allclose(again['half'].values, zm['half'].values)
+
+
+def test_clip_vectorised_cached_and_copy():
+    """clip should keep cells inside the shapes, cache the mask and copy on request."""
+    shapefile = pytest.importorskip('shapefile')
+    geometry = pytest.importorskip('shapely.geometry')
+    Point, Polygon = geometry.Point, geometry.Polygon
+    from imdlib import core
+    with tempfile.TemporaryDirectory() as d:
+        _write_synthetic(d, 'rain', 2019)
+        data = imd.open_data('rain', '2019-06-01', '2019-06-05', 'yearwise', d,
+                             dtype=np.float32)
+        shp = os.path.join(d, 'basin')
+        ring = [(75.1, 18.2), (75.3, 22.9), (80.6, 21.7), (79.9, 18.6),
+                (75.1, 18.2)]
+        with shapefile.Writer(shp, shapeType=shapefile.POLYGON) as w:
+            w.field('NAME', 'C')
+            w.poly([ring])
+            w.record('basin')
+        polygon = Polygon(ring)
+        before = data.data.copy()
+
+        before_lat, before_lon = data.lat_array, data.lon_array
+        basin = data.clip(shp + '.shp', inplace=False)
+        assert np.array_equal(data.data, before)
+        assert data.data.shape == (5, 135, 129)
+        assert len(core._CLIP_MASKS) >= 1
+
+        lon = data.lon_array
+        lat = data.lat_array
+        kept_lon = (lon >= basin.lon_array[0]) & (lon <= basin.lon_array[-1])
+        kept_lat = (lat >= basin.lat_array[0]) & (lat <= basin.lat_array[-1])
+        window = before[:, kept_lon][:, :, kept_lat]
+        for i, x in enumerate(basin.lon_array):
+            for j, y in enumerate(basin.lat_array):
+                if Point(x, y).within(polygon):
+                    assert np.array_equal(basin.data[:, i, j], window[:, i, j])
+                    assert basin.land_mask[i, j] == \
+                        data.land_mask[kept_lon][:, kept_lat][i, j]
+                else:
+                    assert np.isnan(basin.data[:, i, j]).all()
+                    assert not basin.land_mask[i, j]
+
+        out = data.clip(shp + '.shp')
+        assert out is data
+        assert np.array_equal(data.data, basin.data, equal_nan=True)
+        assert np.array_equal(data.land_mask, basin.land_mask)
+        assert np.array_equal(data.get_xarray()['rain'].values,
+                              basin.get_xarray()['rain'].values, equal_nan=True)
+
+        # shapely < 2 falls back to shapely.vectorized with the same mask
+        lon_window, lat_window, inside = core._clip_mask(
+            shp + '.shp', before_lat, before_lon)
+        core._CLIP_MASKS.clear()
+        core.has_shapely2 = False
+        try:
+            _, _, fallback = core._clip_mask(shp + '.shp', before_lat,
+                                             before_lon)
+        finally:
+            core.has_shapely2 = True
+        assert np.array_equal(fallback, inside)